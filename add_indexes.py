@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Add query performance indexes to existing FocusLog databases.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# (name, table, columns)
+INDEXES = [
+    ("idx_captures_ts_cover", "captures", "timestamp, description"),
+    ("idx_captures_labels_label", "captures_labels", "label_id, capture_id"),
+    ("idx_summaries_type_start", "summaries", "summary_type, start_time, end_time"),
+    ("idx_summaries_type_end", "summaries", "summary_type, end_time DESC"),
+    ("idx_summaries_end_time", "summaries", "end_time DESC"),
+    ("idx_labels_last_used", "labels", "last_used DESC, name"),
+]
+
+
+def migrate_database(db_path: str = "focuslog.db"):
+    """Create any missing performance indexes."""
+    
+    if not Path(db_path).exists():
+        print(f"Database {db_path} does not exist.")
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existing = {row[0] for row in cursor.fetchall()}
+    
+    try:
+        for name, table, columns in INDEXES:
+            if name in existing:
+                print(f"✓ {name} already exists")
+                continue
+            
+            print(f"Creating {name} on {table}({columns})...")
+            cursor.execute(f"CREATE INDEX {name} ON {table}({columns})")
+        
+        conn.commit()
+        print("✓ Indexes up to date")
+    except Exception as e:
+        print(f"✗ Error creating indexes: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "focuslog.db"
+    migrate_database(db_path)
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 """
 Backfill summaries for existing captures in the FocusLog database.
-Generates 5-minute and hourly summaries for all past captures.
+Generates 5-minute summaries and hourly rollups for all past captures.
 """
 
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 import argparse
+import asyncio
+import json
+from collections import defaultdict
+from hashlib import blake2b
+from itertools import groupby
+from operator import itemgetter
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -16,10 +22,149 @@ load_dotenv()
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from focuslogd.database import FocusLogDB
-from focuslogd.summarizer import SummaryGenerator
+from focuslogd.summarizer import DEFAULT_SUMMARY_CONCURRENCY, SummaryGenerator
+from focuslogd.video_generator import VideoGenerator
 
+# SQLite's strftime('%s') reads the stored naive timestamps as UTC, so
+# offsetting from a naive epoch maps buckets back to the same wall-clock time
+EPOCH = datetime(1970, 1, 1)
 
-def backfill_summaries(db_path: str = "focuslog.db", api_key: str = None):
+
+def capture_window_key(window) -> tuple:
+    """
+    Key a 5-minute window by its hour and a hash of its labels and descriptions.
+    
+    Windows with the same key in the same hour get the same summary.
+    """
+    start_time, _, captures = window
+    labels = sorted({label for capture in captures for label in capture['labels']})
+    descriptions = sorted({capture['description'] or '' for capture in captures})
+    digest = blake2b(json.dumps([labels, descriptions]).encode(), digest_size=16).digest()
+    return start_time.replace(minute=0, second=0, microsecond=0), digest
+
+
+def summarize_windows(windows, summarize_many, unit: str, concurrency: int, dedup_key=None, close=None):
+    """
+    Summarize windows concurrently, at most `concurrency` requests at a time.
+    
+    Args:
+        windows: List of (start_time, end_time, items) tuples
+        summarize_many: SummaryGenerator bulk method taking a list of window
+            items, such as agenerate_5min_summaries
+        unit: Name of the summarized items, used for progress output
+        concurrency: Maximum number of concurrent summary requests
+        dedup_key: Optional callable mapping a window to a key; windows sharing
+            a key reuse the first window's summary instead of calling the API
+        close: Optional coroutine function run before the event loop ends,
+            to release connections opened on it
+    
+    Returns:
+        List of summary texts, in the same order as windows
+    """
+    # Only the first window with each key is summarized
+    unique = []
+    first_by_key = {}
+    summary_index = []
+    for window in windows:
+        key = dedup_key(window) if dedup_key else None
+        if key is not None and key in first_by_key:
+            summary_index.append(first_by_key[key])
+            continue
+        if key is not None:
+            first_by_key[key] = len(unique)
+        summary_index.append(len(unique))
+        unique.append(window)
+    
+    if dedup_key:
+        print(f"  Reusing summaries for {len(windows) - len(unique)} duplicate windows")
+    
+    def report(index):
+        start_time, end_time, items = unique[index]
+        print(f"  {start_time.strftime('%H:%M:%S')} → {end_time.strftime('%H:%M:%S')}: {len(items)} {unit} ✓")
+    
+    async def _run():
+        try:
+            return await summarize_many(
+                [items for _, _, items in unique], concurrency, on_done=report
+            )
+        finally:
+            if close:
+                await close()
+    
+    summaries = asyncio.run(_run())
+    return [summaries[index] for index in summary_index]
+
+
+def group_windows(rows, window: timedelta, make_item):
+    """
+    Group rows ordered by an epoch-seconds 'bucket' column into windows.
+    
+    Args:
+        rows: Rows with a 'bucket' column, ordered by bucket
+        window: Length of each window
+        make_item: Callable converting a row into a window item
+    
+    Returns:
+        List of (start_time, end_time, items) tuples
+    """
+    windows = []
+    for bucket, group in groupby(rows, key=itemgetter('bucket')):
+        start_time = EPOCH + timedelta(seconds=bucket)
+        windows.append((start_time, start_time + window, [make_item(row) for row in group]))
+    return windows
+
+
+def render_hourly_videos(db: FocusLogDB, summaries, videos_dir: Path) -> int:
+    """
+    Render the time-lapse for each hourly summary, several encodes at a time.
+    
+    Only captures whose screenshot files are still on disk are used, so
+    hours without any get no video.
+    
+    Args:
+        db: Database the summaries were saved to
+        summaries: Hourly summaries with 'id' and 'start_time'
+        videos_dir: Directory to write the videos to
+    
+    Returns:
+        Number of videos saved
+    """
+    try:
+        video_generator = VideoGenerator()
+    except RuntimeError as e:
+        print(f"✗ Video generator failed: {e}")
+        return 0
+    
+    jobs = []
+    summary_ids = []
+    for summary in summaries:
+        start_time = datetime.fromisoformat(summary['start_time'])
+        screenshot_paths = [
+            str(db.video_source_file(capture['screenshot_path']).resolve())
+            for capture in db.iter_captures_since(start_time, until_time=start_time + timedelta(hours=1))
+            if capture['screenshot_path']
+        ]
+        if screenshot_paths:
+            video_path = videos_dir / f"focuslog_{start_time.strftime('%Y%m%d_%H%M%S')}.mp4"
+            jobs.append((screenshot_paths, str(video_path)))
+            summary_ids.append(summary['id'])
+    
+    saved = 0
+    for summary_id, (_, video_path), success in zip(summary_ids, jobs, video_generator.generate_videos(jobs)):
+        if success:
+            db.update_summary_video_path(summary_id, video_path)
+            saved += 1
+    return saved
+
+
+def backfill_summaries(
+    db_path: str = "focuslog.db",
+    api_key: str = None,
+    concurrency: int = DEFAULT_SUMMARY_CONCURRENCY,
+    narrate: bool = False,
+    dedup: bool = True,
+    videos: bool = False
+):
     """Generate summaries for all existing captures."""
     
     if not Path(db_path).exists():
@@ -33,8 +178,11 @@ def backfill_summaries(db_path: str = "focuslog.db", api_key: str = None):
     db = FocusLogDB(db_path=db_path)
     summarizer = SummaryGenerator(api_key=api_key)
     
-    # Get all captures
+    # Bulk-read tuning; FocusLogDB already enables WAL
     cursor = db.conn.cursor()
+    cursor.execute("PRAGMA cache_size=-65536")
+    
+    # Get all captures
     cursor.execute("SELECT MIN(timestamp) as first, MAX(timestamp) as last FROM captures")
     result = cursor.fetchone()
     
@@ -68,92 +216,96 @@ def backfill_summaries(db_path: str = "focuslog.db", api_key: str = None):
     print("\nGenerating 5-minute summaries...")
     print("-"*80)
     
-    # Generate 5-minute summaries
-    current_time = first_capture
-    five_min_count = 0
+    # Load labels for all captures in one query instead of one per capture
+    cursor.execute("""
+        SELECT cl.capture_id, l.name
+        FROM captures_labels cl
+        JOIN labels l ON l.id = cl.label_id
+    """)
+    labels_by_id = defaultdict(list)
+    for row in cursor.fetchall():
+        labels_by_id[row['capture_id']].append(row['name'])
     
-    while current_time < last_capture:
-        end_time = current_time + timedelta(minutes=5)
-        
-        # Get captures in this 5-minute window
-        captures = []
-        cursor.execute("""
-            SELECT id, timestamp, description, classification_error
-            FROM captures
-            WHERE timestamp >= ? AND timestamp < ?
-            ORDER BY timestamp ASC
-        """, (current_time.isoformat(), end_time.isoformat()))
-        
-        for row in cursor.fetchall():
-            capture = dict(row)
-            # Get labels
-            cursor.execute("""
-                SELECT l.name
-                FROM labels l
-                JOIN captures_labels cl ON l.id = cl.label_id
-                WHERE cl.capture_id = ?
-            """, (capture['id'],))
-            capture['labels'] = [r['name'] for r in cursor.fetchall()]
-            captures.append(capture)
-        
-        if captures:
-            print(f"  {current_time.strftime('%H:%M:%S')} → {end_time.strftime('%H:%M:%S')}: {len(captures)} captures", end=" ")
-            
-            # Generate summary
-            summary = summarizer.generate_5min_summary(captures)
-            
-            # Save to database
-            db.save_summary(
-                summary_type='5min',
-                start_time=current_time,
-                end_time=end_time,
-                content=summary
-            )
-            
-            print("✓")
-            five_min_count += 1
-        
-        current_time = end_time
+    def make_capture(row):
+        capture = dict(row)
+        del capture['bucket']
+        capture['labels'] = labels_by_id.get(capture['id'], [])
+        return capture
+    
+    # Scan all captures once, bucketed into 5-minute windows by SQLite
+    cursor.execute("""
+        SELECT (CAST(strftime('%s', timestamp) AS INTEGER) / 300) * 300 as bucket,
+               id, timestamp, description, classification_error
+        FROM captures
+        ORDER BY bucket, timestamp
+    """)
+    windows = group_windows(cursor.fetchall(), timedelta(minutes=5), make_capture)
+    
+    # Generate summaries concurrently, then save them in one transaction
+    summaries = summarize_windows(
+        windows, summarizer.agenerate_5min_summaries, "captures", concurrency,
+        dedup_key=capture_window_key if dedup else None,
+        close=summarizer.aclose
+    )
+    db.save_summaries([
+        ('5min', start_time, end_time, summary)
+        for (start_time, end_time, _), summary in zip(windows, summaries)
+    ])
     
-    print(f"\n✓ Generated {five_min_count} 5-minute summaries")
+    print(f"\n✓ Generated {len(summaries)} 5-minute summaries")
     
-    # Generate hourly summaries
+    # Hourly summaries are deterministic rollups computed entirely in SQLite
     print("\nGenerating hourly summaries...")
     print("-"*80)
     
-    current_time = first_capture
-    hourly_count = 0
+    rollups = db.save_hourly_rollups()
+    print(f"\n✓ Generated {len(rollups)} hourly summaries")
     
-    while current_time < last_capture:
-        end_time = current_time + timedelta(hours=1)
+    if narrate and rollups:
+        print("\nGenerating hourly narratives...")
+        print("-"*80)
+        
+        def make_summary(row):
+            summary = dict(row)
+            del summary['bucket']
+            return summary
         
-        # Get 5-min summaries in this hour
-        five_min_summaries = db.get_summaries_in_range(
-            summary_type='5min',
-            start_time=current_time,
-            end_time=end_time
+        # Bucket 5-min summaries into the same hours as the rollups
+        cursor.execute("""
+            SELECT (CAST(strftime('%s', start_time) AS INTEGER) / 3600) * 3600 as bucket,
+                   id, summary_type, start_time, end_time, content, created_at
+            FROM summaries
+            WHERE summary_type = '5min'
+            ORDER BY bucket, start_time
+        """)
+        rollups_by_start = {rollup['start_time']: rollup for rollup in rollups}
+        windows = [
+            window
+            for window in group_windows(cursor.fetchall(), timedelta(hours=1), make_summary)
+            if window[0].isoformat() in rollups_by_start
+        ]
+        
+        narratives = summarize_windows(
+            windows, summarizer.agenerate_hourly_summaries, "5-min summaries", concurrency,
+            close=summarizer.aclose
         )
         
-        if five_min_summaries:
-            print(f"  {current_time.strftime('%H:%M:%S')} → {end_time.strftime('%H:%M:%S')}: {len(five_min_summaries)} 5-min summaries", end=" ")
-            
-            # Generate summary
-            summary = summarizer.generate_hourly_summary(five_min_summaries)
-            
-            # Save to database
-            db.save_summary(
-                summary_type='hourly',
-                start_time=current_time,
-                end_time=end_time,
-                content=summary
-            )
-            
-            print("✓")
-            hourly_count += 1
+        # Keep the rollup figures under the narrative
+        updates = []
+        for (start_time, _, _), narrative in zip(windows, narratives):
+            rollup = rollups_by_start[start_time.isoformat()]
+            updates.append((f"{narrative}\n\n{rollup['content']}", rollup['id']))
+        with db.transaction() as cursor:
+            cursor.executemany("UPDATE summaries SET content = ? WHERE id = ?", updates)
         
-        current_time = end_time
+        print(f"\n✓ Generated {len(updates)} hourly narratives")
     
-    print(f"\n✓ Generated {hourly_count} hourly summaries")
+    if videos and rollups:
+        print("\nGenerating hourly videos...")
+        print("-"*80)
+        
+        saved = render_hourly_videos(db, rollups, Path("videos"))
+        print(f"\n✓ Generated {saved} hourly videos")
     
     print("\n" + "="*80)
     print("Backfill complete!")
@@ -175,7 +327,35 @@ if __name__ == "__main__":
         type=str,
         help="OpenAI API key (or use OPENAI_API_KEY env var)"
     )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=DEFAULT_SUMMARY_CONCURRENCY,
+        help=f"Maximum concurrent summary requests (default: {DEFAULT_SUMMARY_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "-n", "--narrate",
+        action="store_true",
+        help="Also generate LLM narratives for hourly summaries"
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Summarize every 5-minute window, even ones identical to an earlier window in the same hour"
+    )
+    parser.add_argument(
+        "-v", "--videos",
+        action="store_true",
+        help="Also render time-lapse videos for the hourly summaries"
+    )
     
     args = parser.parse_args()
     
-    backfill_summaries(db_path=args.database, api_key=args.api_key)
+    backfill_summaries(
+        db_path=args.database,
+        api_key=args.api_key,
+        concurrency=args.concurrency,
+        narrate=args.narrate,
+        dedup=not args.no_dedup,
+        videos=args.videos
+    )
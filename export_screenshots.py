@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Move legacy screenshot blobs out of the FocusLog captures table into files.
+
+Older versions stored every screenshot inline in the captures row, so even
+queries that never touch the image page through its overflow chain. New
+captures already go to screenshots/ next to the database; this moves the
+old ones there too and leaves an empty blob behind.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from focuslogd.database import FocusLogDB
+
+
+def export_screenshots(db_path: str = "focuslog.db", batch_size: int = 100):
+    """Write legacy blobs to screenshot files in batches, one transaction per batch."""
+    
+    if not Path(db_path).exists():
+        print(f"Database {db_path} does not exist.")
+        return
+    
+    db = FocusLogDB(db_path=db_path)
+    
+    exported = 0
+    freed_bytes = 0
+    last_id = 0
+    
+    try:
+        while True:
+            cursor = db.conn.execute("""
+                SELECT id, timestamp, screenshot
+                FROM captures
+                WHERE id > ? AND length(screenshot) > 0
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            
+            if not rows:
+                break
+            
+            # Files are written before the rows point at them, so a crash
+            # leaves at worst an unreferenced file
+            updates = []
+            for row in rows:
+                screenshot_path = db.store_screenshot(
+                    row['screenshot'], datetime.fromisoformat(row['timestamp'])
+                )
+                updates.append((screenshot_path, row['id']))
+                freed_bytes += len(row['screenshot'])
+            
+            with db.transaction() as cursor:
+                cursor.executemany(
+                    "UPDATE captures SET screenshot = X'', screenshot_path = ? WHERE id = ?",
+                    updates
+                )
+            
+            exported += len(rows)
+            last_id = rows[-1]['id']
+            print(f"  Exported {exported} screenshots...")
+        
+        if exported == 0:
+            print("✓ No screenshot blobs to export")
+            return
+        
+        print(f"✓ Exported {exported} screenshots to {db.screenshots_dir}, "
+              f"{freed_bytes / (1024 * 1024):.1f} MB moved out of the database")
+        
+        # Return the freed pages to the filesystem
+        print("Vacuuming database...")
+        db.conn.execute("VACUUM")
+        print("✓ Done")
+    except Exception as e:
+        print(f"✗ Error exporting screenshots: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move FocusLog screenshot blobs into files")
+    parser.add_argument(
+        "-d", "--database",
+        type=str,
+        default="focuslog.db",
+        help="Path to database file (default: focuslog.db)"
+    )
+    parser.add_argument(
+        "-b", "--batch-size",
+        type=int,
+        default=100,
+        help="Screenshots exported per transaction (default: 100)"
+    )
+    
+    args = parser.parse_args()
+    export_screenshots(args.database, args.batch_size)
@@ -32,6 +32,10 @@ def migrate_database(db_path: str = "focuslog.db"):
     print("Starting migration...")
     
     try:
+        # Run the whole migration in one write transaction so a failure
+        # rolls back the schema changes too
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Create new tables
         print("  Creating labels table...")
         cursor.execute("""
@@ -43,17 +47,6 @@ def migrate_database(db_path: str = "focuslog.db"):
             )
         """)
         
-        print("  Creating captures_labels junction table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS captures_labels (
-                capture_id INTEGER NOT NULL,
-                label_id INTEGER NOT NULL,
-                PRIMARY KEY (capture_id, label_id),
-                FOREIGN KEY (capture_id) REFERENCES captures(id) ON DELETE CASCADE,
-                FOREIGN KEY (label_id) REFERENCES labels(id) ON DELETE CASCADE
-            )
-        """)
-        
         print("  Creating summaries table...")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS summaries (
@@ -80,7 +73,8 @@ def migrate_database(db_path: str = "focuslog.db"):
                 description TEXT,
                 classification_raw TEXT,
                 classification_error TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                screenshot_path TEXT
             )
         """)
         
@@ -92,23 +86,66 @@ def migrate_database(db_path: str = "focuslog.db"):
             FROM captures_old
         """)
         
+        # Drop old table
+        print("  Cleaning up...")
+        cursor.execute("DROP TABLE captures_old")
+        
+        # Created only after the rename: renaming captures would otherwise
+        # repoint this table's foreign key at captures_old
+        print("  Creating captures_labels junction table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS captures_labels (
+                capture_id INTEGER NOT NULL,
+                label_id INTEGER NOT NULL,
+                PRIMARY KEY (capture_id, label_id),
+                FOREIGN KEY (capture_id) REFERENCES captures(id) ON DELETE CASCADE,
+                FOREIGN KEY (label_id) REFERENCES labels(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        """)
+        
         # Create indexes
         print("  Creating indexes...")
+        # Covering index: range scans by time get id (the rowid) and description
+        # without touching the table
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_captures_timestamp 
-            ON captures(timestamp)
+            CREATE INDEX IF NOT EXISTS idx_captures_ts_cover
+            ON captures(timestamp, description)
         """)
         
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_summaries_time 
-            ON summaries(start_time, end_time, summary_type)
+            CREATE INDEX IF NOT EXISTS idx_summaries_type_start
+            ON summaries(summary_type, start_time, end_time)
         """)
         
-        # Drop old table
-        print("  Cleaning up...")
-        cursor.execute("DROP TABLE captures_old")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_captures_labels_label
+            ON captures_labels(label_id, capture_id)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_summaries_type_end
+            ON summaries(summary_type, end_time DESC)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_summaries_end_time
+            ON summaries(end_time DESC)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_labels_last_used
+            ON labels(last_used DESC, name)
+        """)
         
         conn.commit()
+        
+        # Rebuild planner statistics for the new tables and indexes, then
+        # reclaim the space left behind by the dropped table
+        print("  Analyzing...")
+        cursor.execute("ANALYZE")
+        print("  Vacuuming...")
+        cursor.execute("VACUUM")
+        
         print("\n✓ Migration completed successfully!")
         
         # Show stats
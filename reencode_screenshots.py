@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Re-encode PNG screenshots stored in the FocusLog database as JPEG.
+
+Captures are now stored as JPEG, which is typically 5-10x smaller than
+the PNG blobs written by older versions.
+"""
+
+import argparse
+import io
+import sqlite3
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Same quality the capture pipeline uses
+JPEG_QUALITY = 85
+
+
+def to_jpeg(png_data: bytes) -> bytes:
+    """Re-encode PNG bytes as JPEG."""
+    with Image.open(io.BytesIO(png_data)) as im:
+        out = io.BytesIO()
+        im.convert("RGB").save(out, format="JPEG", quality=JPEG_QUALITY)
+        return out.getvalue()
+
+
+def migrate_database(db_path: str = "focuslog.db", batch_size: int = 100):
+    """Re-encode PNG screenshots as JPEG in batches, one transaction per batch."""
+    
+    if not Path(db_path).exists():
+        print(f"Database {db_path} does not exist.")
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    converted = 0
+    saved_bytes = 0
+    last_id = 0
+    
+    try:
+        while True:
+            cursor.execute("""
+                SELECT id, screenshot
+                FROM captures
+                WHERE id > ? AND substr(screenshot, 1, 8) = ?
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, PNG_SIGNATURE, batch_size))
+            rows = cursor.fetchall()
+            
+            if not rows:
+                break
+            
+            updates = []
+            for capture_id, png_data in rows:
+                jpeg_data = to_jpeg(png_data)
+                updates.append((jpeg_data, capture_id))
+                saved_bytes += len(png_data) - len(jpeg_data)
+            
+            with conn:
+                conn.executemany("UPDATE captures SET screenshot = ? WHERE id = ?", updates)
+            
+            converted += len(rows)
+            last_id = rows[-1][0]
+            print(f"  Re-encoded {converted} screenshots...")
+        
+        if converted == 0:
+            print("✓ No PNG screenshots to re-encode")
+            return
+        
+        print(f"✓ Re-encoded {converted} screenshots, "
+              f"saved {saved_bytes / (1024 * 1024):.1f} MB")
+        
+        # Return the freed pages to the filesystem
+        print("Vacuuming database...")
+        conn.execute("VACUUM")
+        print("✓ Done")
+    except Exception as e:
+        print(f"✗ Error re-encoding screenshots: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-encode FocusLog PNG screenshots as JPEG")
+    parser.add_argument(
+        "-d", "--database",
+        type=str,
+        default="focuslog.db",
+        help="Path to database file (default: focuslog.db)"
+    )
+    parser.add_argument(
+        "-b", "--batch-size",
+        type=int,
+        default=100,
+        help="Screenshots re-encoded per transaction (default: 100)"
+    )
+    
+    args = parser.parse_args()
+    migrate_database(args.database, args.batch_size)
@@ -2,20 +2,108 @@
 Web dashboard for FocusLog analytics and visualization.
 """
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, render_template, jsonify, request, send_file, g
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 from collections import Counter, defaultdict
+from functools import lru_cache
 import os
+import threading
+
+import orjson
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from focuslogd.database import FocusLogDB
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson instead of the stdlib json module."""
+    
+    def _options(self) -> int:
+        return orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._options()
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype
+        )
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 DB_PATH = "focuslog.db"
 
+# Seconds to reuse computed API responses for repeated dashboard polls
+CACHE_TIMEOUT = 30
+
+# Let a fronting web server that honours X-Sendfile stream video files
+app.use_x_sendfile = os.getenv('FOCUSLOG_USE_X_SENDFILE') == '1'
+
+cache = Cache(app, config={
+    'CACHE_TYPE': 'SimpleCache',
+    'CACHE_DEFAULT_TIMEOUT': CACHE_TIMEOUT
+})
+
+
+# Read-only connections shared by all request threads; requests beyond
+# this many wait for a connection to be released
+DB_POOL_SIZE = 4
+
+# One read-only database for the whole process, opened on first use
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db() -> FocusLogDB:
+    """Return the process-wide read-only database, opening it on first use."""
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = FocusLogDB(db_path=DB_PATH, read_only=True, read_pool_size=DB_POOL_SIZE)
+        return _db
+
+
+@app.before_request
+def attach_db():
+    """Borrow a pooled connection for the request as g.conn (g.db for its helpers)."""
+    g.db = get_db()
+    g.db_reader = g.db.read_connection()
+    g.conn = g.db_reader.__enter__()
+
+
+@app.teardown_appcontext
+def release_db(exc):
+    """Return the request's connection to the pool."""
+    reader = g.pop('db_reader', None)
+    if reader is not None:
+        reader.__exit__(None, None, None)
+
+
+@app.after_request
+def add_etag(response):
+    """Tag JSON responses so unchanged polls are answered with 304 Not Modified."""
+    if (request.method == 'GET'
+            and response.status_code == 200
+            and response.mimetype == 'application/json'):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
 
 @app.route('/')
 def index():
@@ -24,299 +112,315 @@ def index():
 
 
 @app.route('/api/stats')
+@cache.cached(query_string=True)
 def get_stats():
     """Get overall statistics."""
-    with FocusLogDB(db_path=DB_PATH) as db:
-        stats = db.get_statistics()
-        
-        # Get label counts
-        cursor = db.conn.cursor()
-        cursor.execute("""
-            SELECT l.name, COUNT(*) as count
-            FROM labels l
-            JOIN captures_labels cl ON l.id = cl.label_id
-            GROUP BY l.name
-            ORDER BY count DESC
-        """)
-        label_counts = {row['name']: row['count'] for row in cursor.fetchall()}
-        
-        # Get total summaries
-        cursor.execute("SELECT COUNT(*) as count FROM summaries WHERE summary_type = '5min'")
-        five_min_summaries = cursor.fetchone()['count']
-        cursor.execute("SELECT COUNT(*) as count FROM summaries WHERE summary_type = 'hourly'")
-        hourly_summaries = cursor.fetchone()['count']
-        
-        return jsonify({
-            'total_captures': stats['total_captures'],
-            'first_capture': stats['first_capture'],
-            'last_capture': stats['last_capture'],
-            'total_size_mb': stats['total_size_mb'],
-            'total_labels': len(label_counts),
-            'label_counts': label_counts,
-            'five_min_summaries': five_min_summaries,
-            'hourly_summaries': hourly_summaries
-        })
+    stats = g.db.get_statistics()
+    
+    # Get label counts as [name, count] pairs, most used first
+    cursor = g.conn.cursor()
+    cursor.execute("""
+        SELECT l.name, COUNT(*) as count
+        FROM labels l
+        JOIN captures_labels cl ON l.id = cl.label_id
+        GROUP BY l.name
+        ORDER BY count DESC
+    """)
+    label_counts = [list(row) for row in cursor.fetchall()]
+    
+    cursor.execute("SELECT COUNT(*) as count FROM labels")
+    total_labels = cursor.fetchone()['count']
+    
+    # Get total summaries of each type
+    cursor.execute("""
+        SELECT summary_type, COUNT(*) as count
+        FROM summaries
+        GROUP BY summary_type
+    """)
+    summary_counts = {row['summary_type']: row['count'] for row in cursor.fetchall()}
+    
+    return jsonify({
+        'total_captures': stats['total_captures'],
+        'first_capture': stats['first_capture'],
+        'last_capture': stats['last_capture'],
+        'total_size_mb': stats['total_size_mb'],
+        'total_labels': total_labels,
+        'label_counts': label_counts,
+        'five_min_summaries': summary_counts.get('5min', 0),
+        'hourly_summaries': summary_counts.get('hourly', 0)
+    })
 
 
 @app.route('/api/timeline')
+@cache.cached(query_string=True)
 def get_timeline():
     """Get timeline data for visualization."""
     # Get date range from query params
     start_date = request.args.get('start')
     end_date = request.args.get('end')
     
-    with FocusLogDB(db_path=DB_PATH) as db:
-        cursor = db.conn.cursor()
-        
-        if start_date and end_date:
-            cursor.execute("""
-                SELECT c.id, c.timestamp, l.name as label
-                FROM captures c
-                JOIN captures_labels cl ON c.id = cl.capture_id
-                JOIN labels l ON cl.label_id = l.id
-                WHERE c.timestamp BETWEEN ? AND ?
-                ORDER BY c.timestamp ASC
-            """, (start_date, end_date))
-        else:
-            # Last 24 hours by default
-            cursor.execute("""
-                SELECT c.id, c.timestamp, l.name as label
-                FROM captures c
-                JOIN captures_labels cl ON c.id = cl.capture_id
-                JOIN labels l ON cl.label_id = l.id
-                WHERE c.timestamp >= datetime('now', '-1 day')
-                ORDER BY c.timestamp ASC
-            """)
-        
-        timeline_data = []
-        for row in cursor.fetchall():
-            timeline_data.append({
-                'id': row['id'],
-                'timestamp': row['timestamp'],
-                'label': row['label']
-            })
-        
-        return jsonify(timeline_data)
+    cursor = g.conn.cursor()
+    # Plain tuples: this endpoint can return thousands of rows
+    cursor.row_factory = None
+    
+    if start_date and end_date:
+        cursor.execute("""
+            SELECT c.id, c.timestamp, l.name as label
+            FROM captures c
+            JOIN captures_labels cl ON c.id = cl.capture_id
+            JOIN labels l ON cl.label_id = l.id
+            WHERE c.timestamp BETWEEN ? AND ?
+            ORDER BY c.timestamp ASC
+        """, (start_date, end_date))
+    else:
+        # Last 24 hours by default
+        cursor.execute("""
+            SELECT c.id, c.timestamp, l.name as label
+            FROM captures c
+            JOIN captures_labels cl ON c.id = cl.capture_id
+            JOIN labels l ON cl.label_id = l.id
+            WHERE c.timestamp >= datetime('now', '-1 day')
+            ORDER BY c.timestamp ASC
+        """)
+    
+    timeline_data = [
+        {'id': capture_id, 'timestamp': timestamp, 'label': label}
+        for capture_id, timestamp, label in cursor
+    ]
+    
+    return jsonify(timeline_data)
 
 
 @app.route('/api/label_time')
+@cache.cached(query_string=True)
 def get_label_time():
     """Calculate time spent per label (15 seconds per capture)."""
     start_date = request.args.get('start')
     end_date = request.args.get('end')
     
-    with FocusLogDB(db_path=DB_PATH) as db:
-        cursor = db.conn.cursor()
-        
-        if start_date and end_date:
-            cursor.execute("""
-                SELECT l.name, COUNT(*) as count
-                FROM captures c
-                JOIN captures_labels cl ON c.id = cl.capture_id
-                JOIN labels l ON cl.label_id = l.id
-                WHERE c.timestamp BETWEEN ? AND ?
-                GROUP BY l.name
-                ORDER BY count DESC
-            """, (start_date, end_date))
-        else:
-            cursor.execute("""
-                SELECT l.name, COUNT(*) as count
-                FROM captures c
-                JOIN captures_labels cl ON c.id = cl.capture_id
-                JOIN labels l ON cl.label_id = l.id
-                WHERE c.timestamp >= datetime('now', '-1 day')
-                GROUP BY l.name
-                ORDER BY count DESC
-            """)
-        
-        label_times = []
-        for row in cursor.fetchall():
-            # Each capture = 15 seconds
-            seconds = row['count'] * 15
-            minutes = seconds / 60
-            hours = minutes / 60
-            
-            label_times.append({
-                'label': row['name'],
-                'count': row['count'],
-                'seconds': seconds,
-                'minutes': round(minutes, 1),
-                'hours': round(hours, 2)
-            })
-        
-        return jsonify(label_times)
+    cursor = g.conn.cursor()
+    
+    # Each capture = 15 seconds; durations are computed in SQL so only
+    # the aggregated rows are returned
+    if start_date and end_date:
+        cursor.execute("""
+            SELECT l.name as label,
+                   COUNT(*) as count,
+                   COUNT(*) * 15 as seconds,
+                   ROUND(COUNT(*) * 15 / 60.0, 1) as minutes,
+                   ROUND(COUNT(*) * 15 / 3600.0, 2) as hours
+            FROM captures c
+            JOIN captures_labels cl ON c.id = cl.capture_id
+            JOIN labels l ON cl.label_id = l.id
+            WHERE c.timestamp BETWEEN ? AND ?
+            GROUP BY l.name
+            ORDER BY count DESC
+        """, (start_date, end_date))
+    else:
+        cursor.execute("""
+            SELECT l.name as label,
+                   COUNT(*) as count,
+                   COUNT(*) * 15 as seconds,
+                   ROUND(COUNT(*) * 15 / 60.0, 1) as minutes,
+                   ROUND(COUNT(*) * 15 / 3600.0, 2) as hours
+            FROM captures c
+            JOIN captures_labels cl ON c.id = cl.capture_id
+            JOIN labels l ON cl.label_id = l.id
+            WHERE c.timestamp >= datetime('now', '-1 day')
+            GROUP BY l.name
+            ORDER BY count DESC
+        """)
+    
+    label_times = [dict(row) for row in cursor.fetchall()]
+    
+    return jsonify(label_times)
 
 
 @app.route('/api/heatmap')
+@cache.cached(query_string=True)
 def get_heatmap():
     """Get hourly activity heatmap data."""
     days = int(request.args.get('days', 7))
     
-    with FocusLogDB(db_path=DB_PATH) as db:
-        cursor = db.conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                date(timestamp) as date,
-                strftime('%H', timestamp) as hour,
-                COUNT(*) as count
-            FROM captures
-            WHERE timestamp >= datetime('now', ? || ' days')
-            GROUP BY date, hour
-            ORDER BY date, hour
-        """, (f'-{days}',))
-        
-        heatmap_data = []
-        for row in cursor.fetchall():
-            heatmap_data.append({
-                'date': row['date'],
-                'hour': int(row['hour']),
-                'count': row['count']
-            })
-        
-        return jsonify(heatmap_data)
+    cursor = g.conn.cursor()
+    
+    cursor.execute("""
+        SELECT 
+            date(timestamp) as date,
+            CAST(strftime('%H', timestamp) AS INTEGER) as hour,
+            COUNT(*) as count
+        FROM captures
+        WHERE timestamp >= datetime('now', ? || ' days')
+        GROUP BY date, hour
+        ORDER BY date, hour
+    """, (f'-{days}',))
+    
+    heatmap_data = [dict(row) for row in cursor.fetchall()]
+    
+    return jsonify(heatmap_data)
 
 
 @app.route('/api/recent_captures')
+@cache.cached(query_string=True)
 def get_recent_captures():
     """Get recent captures with labels and descriptions."""
     limit = int(request.args.get('limit', 20))
     
-    with FocusLogDB(db_path=DB_PATH) as db:
-        captures = db.get_recent_captures(limit=limit, include_screenshots=False)
-        return jsonify(captures)
+    captures = g.db.get_recent_captures_lite(limit=limit)
+    return jsonify(captures)
 
 
 @app.route('/api/recent_summaries')
+@cache.cached(query_string=True)
 def get_recent_summaries():
     """Get recent summaries with video paths."""
     summary_type = request.args.get('type', 'all')
     limit = int(request.args.get('limit', 10))
     
-    with FocusLogDB(db_path=DB_PATH) as db:
-        cursor = db.conn.cursor()
-        
-        if summary_type == 'all':
-            cursor.execute("""
-                SELECT id, summary_type, start_time, end_time, content, video_path
-                FROM summaries
-                ORDER BY end_time DESC
-                LIMIT ?
-            """, (limit,))
-        else:
-            cursor.execute("""
-                SELECT id, summary_type, start_time, end_time, content, video_path
-                FROM summaries
-                WHERE summary_type = ?
-                ORDER BY end_time DESC
-                LIMIT ?
-            """, (summary_type, limit))
-        
-        summaries = []
-        for row in cursor.fetchall():
-            summaries.append({
-                'id': row['id'],
-                'type': row['summary_type'],
-                'start_time': row['start_time'],
-                'end_time': row['end_time'],
-                'content': row['content'],
-                'video_path': row['video_path']
-            })
-        
-        return jsonify(summaries)
+    cursor = g.conn.cursor()
+    
+    if summary_type == 'all':
+        cursor.execute("""
+            SELECT id, summary_type, start_time, end_time, content, video_path
+            FROM summaries
+            ORDER BY end_time DESC
+            LIMIT ?
+        """, (limit,))
+    else:
+        cursor.execute("""
+            SELECT id, summary_type, start_time, end_time, content, video_path
+            FROM summaries
+            WHERE summary_type = ?
+            ORDER BY end_time DESC
+            LIMIT ?
+        """, (summary_type, limit))
+    
+    summaries = []
+    for row in cursor.fetchall():
+        summaries.append({
+            'id': row['id'],
+            'type': row['summary_type'],
+            'start_time': row['start_time'],
+            'end_time': row['end_time'],
+            'content': row['content'],
+            'video_path': row['video_path']
+        })
+    
+    return jsonify(summaries)
+
+
+@lru_cache(maxsize=512)
+def _get_video_path(summary_id: int) -> Path:
+    """
+    Resolve the video file for a summary.
+    
+    Cached so the many range requests issued during playback skip the
+    database lookup. Raises LookupError (which is not cached) if the
+    summary has no video yet.
+    """
+    cursor = g.conn.cursor()
+    cursor.execute("""
+        SELECT video_path
+        FROM summaries
+        WHERE id = ?
+    """, (summary_id,))
+    
+    row = cursor.fetchone()
+    if not row or not row['video_path']:
+        raise LookupError(summary_id)
+    
+    video_path = Path(row['video_path'])
+    
+    # Make path absolute if it's relative
+    if not video_path.is_absolute():
+        video_path = Path(__file__).parent.parent.parent / video_path
+    
+    return video_path
 
 
 @app.route('/api/video/<int:summary_id>')
 def get_video(summary_id):
     """Serve video file for a specific summary."""
-    with FocusLogDB(db_path=DB_PATH) as db:
-        cursor = db.conn.cursor()
-        cursor.execute("""
-            SELECT video_path
-            FROM summaries
-            WHERE id = ?
-        """, (summary_id,))
-        
-        row = cursor.fetchone()
-        if not row or not row['video_path']:
-            return jsonify({'error': 'Video not found'}), 404
-        
-        video_path = Path(row['video_path'])
-        
-        # Make path absolute if it's relative
-        if not video_path.is_absolute():
-            video_path = Path(__file__).parent.parent.parent / video_path
-        
-        if not video_path.exists():
-            return jsonify({'error': f'Video file not found on disk: {video_path}'}), 404
-        
-        return send_file(
-            str(video_path),
-            mimetype='video/mp4',
-            as_attachment=False,
-            download_name=video_path.name
-        )
+    try:
+        video_path = _get_video_path(summary_id)
+    except LookupError:
+        return jsonify({'error': 'Video not found'}), 404
+    
+    if not video_path.exists():
+        return jsonify({'error': f'Video file not found on disk: {video_path}'}), 404
+    
+    # Conditional responses support Range requests (seeking) and 304s
+    return send_file(
+        str(video_path),
+        mimetype='video/mp4',
+        as_attachment=False,
+        download_name=video_path.name,
+        conditional=True,
+        etag=True,
+        last_modified=video_path.stat().st_mtime
+    )
 
 
 @app.route('/api/daily_summary')
+@cache.cached(query_string=True)
 def get_daily_summary():
     """Get summary for a specific day."""
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
     
-    with FocusLogDB(db_path=DB_PATH) as db:
-        cursor = db.conn.cursor()
-        
-        # Get all captures for the day
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM captures
-            WHERE date(timestamp) = ?
-        """, (date,))
-        total_captures = cursor.fetchone()['count']
-        
-        # Get label distribution for the day
-        cursor.execute("""
-            SELECT l.name, COUNT(*) as count
-            FROM captures c
-            JOIN captures_labels cl ON c.id = cl.capture_id
-            JOIN labels l ON cl.label_id = l.id
-            WHERE date(c.timestamp) = ?
-            GROUP BY l.name
-            ORDER BY count DESC
-        """, (date,))
-        
-        labels = []
-        for row in cursor.fetchall():
-            labels.append({
-                'name': row['name'],
-                'count': row['count'],
-                'minutes': round((row['count'] * 15) / 60, 1)
-            })
-        
-        # Get hourly summaries for the day
-        cursor.execute("""
-            SELECT start_time, end_time, content
-            FROM summaries
-            WHERE summary_type = 'hourly'
-                AND date(start_time) = ?
-            ORDER BY start_time ASC
-        """, (date,))
-        
-        hourly_summaries = []
-        for row in cursor.fetchall():
-            hourly_summaries.append({
-                'start_time': row['start_time'],
-                'end_time': row['end_time'],
-                'content': row['content']
-            })
-        
-        return jsonify({
-            'date': date,
-            'total_captures': total_captures,
-            'total_minutes': round((total_captures * 15) / 60, 1),
-            'labels': labels,
-            'hourly_summaries': hourly_summaries
+    cursor = g.conn.cursor()
+    
+    # Get all captures for the day
+    cursor.execute("""
+        SELECT COUNT(*) as count
+        FROM captures
+        WHERE date(timestamp) = ?
+    """, (date,))
+    total_captures = cursor.fetchone()['count']
+    
+    # Get label distribution for the day
+    cursor.execute("""
+        SELECT l.name, COUNT(*) as count
+        FROM captures c
+        JOIN captures_labels cl ON c.id = cl.capture_id
+        JOIN labels l ON cl.label_id = l.id
+        WHERE date(c.timestamp) = ?
+        GROUP BY l.name
+        ORDER BY count DESC
+    """, (date,))
+    
+    labels = []
+    for row in cursor.fetchall():
+        labels.append({
+            'name': row['name'],
+            'count': row['count'],
+            'minutes': round((row['count'] * 15) / 60, 1)
+        })
+    
+    # Get hourly summaries for the day; a range on start_time (rather than
+    # date(start_time)) lets the summary_type/start_time index serve it
+    cursor.execute("""
+        SELECT start_time, end_time, content
+        FROM summaries
+        WHERE summary_type = 'hourly'
+            AND start_time >= ? AND start_time < date(?, '+1 day')
+        ORDER BY start_time ASC
+    """, (date, date))
+    
+    hourly_summaries = []
+    for row in cursor.fetchall():
+        hourly_summaries.append({
+            'start_time': row['start_time'],
+            'end_time': row['end_time'],
+            'content': row['content']
         })
+    
+    return jsonify({
+        'date': date,
+        'total_captures': total_captures,
+        'total_minutes': round((total_captures * 15) / 60, 1),
+        'labels': labels,
+        'hourly_summaries': hourly_summaries
+    })
 
 
 if __name__ == '__main__':
@@ -11,6 +11,6 @@ class CaptureStrategy(ABC):
         Capture a screenshot and return the image data as bytes.
         
         Returns:
-            bytes: PNG image data, or None if capture failed
+            bytes: JPEG image data, or None if capture failed
         """
         pass
\ No newline at end of file
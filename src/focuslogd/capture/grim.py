@@ -1,10 +1,23 @@
+import select
+import shutil
 import subprocess
-import tempfile
-from pathlib import Path
+import time
 from typing import Optional
 
 from .base import CaptureStrategy
 
+# Resolved once at import so neither init nor captures search PATH again
+_GRIM_PATH = shutil.which("grim")
+
+# Seconds before a hung grim process is killed
+_CAPTURE_TIMEOUT = 5
+
+# Starting size of the reusable capture buffer (grows on demand)
+_INITIAL_BUFFER_SIZE = 8 * 1024 * 1024
+
+# JPEG quality for screenshots; a fraction of the size of grim's default PNG
+_JPEG_QUALITY = 85
+
 
 class GrimCapture(CaptureStrategy):
     """Screenshot capture using grim (Wayland screenshot utility)."""
@@ -12,54 +25,89 @@ class GrimCapture(CaptureStrategy):
     def __init__(self):
         """Initialize the Grim capture strategy."""
         self._check_grim_available()
+        # Reused for every capture; grows to the largest screenshot seen
+        self._buf = bytearray(_INITIAL_BUFFER_SIZE)
     
     def _check_grim_available(self) -> None:
         """Check if grim is installed and available."""
-        try:
-            subprocess.run(
-                ["which", "grim"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-        except subprocess.CalledProcessError:
+        if _GRIM_PATH is None:
             raise RuntimeError(
                 "grim is not installed. Please install it: "
                 "sudo apt install grim (Debian/Ubuntu) or sudo pacman -S grim (Arch)"
             )
     
+    def _read_into_buffer(self, stream, deadline: float) -> int:
+        """
+        Read a stream to EOF into the reusable buffer.
+        
+        Args:
+            stream: Unbuffered binary stream to read from
+            deadline: time.monotonic() value to give up at
+        
+        Returns:
+            int: Number of bytes read
+        
+        Raises:
+            TimeoutError: If the stream hasn't reached EOF by the deadline
+        """
+        size = 0
+        while True:
+            if size == len(self._buf):
+                # Buffer full: double it (no views may be held while resizing)
+                self._buf.extend(bytes(len(self._buf)))
+            
+            # Wait for data without blocking past the deadline; an unbuffered
+            # read then returns whatever is available
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([stream], [], [], remaining)[0]:
+                raise TimeoutError
+            
+            with memoryview(self._buf)[size:] as chunk:
+                n = stream.readinto(chunk)
+            if not n:
+                return size
+            size += n
+    
     def capture(self) -> Optional[bytes]:
         """
         Capture a screenshot using grim.
         
         Returns:
-            bytes: PNG image data, or None if capture failed
+            bytes: JPEG image data, or None if capture failed
         """
         try:
-            # Create a temporary file for the screenshot
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-            
-            # Capture screenshot with grim
-            result = subprocess.run(
-                ["grim", tmp_path],
-                check=True,
-                capture_output=True,
-                text=True,
-                timeout=5
+            # Capture screenshot with grim, streaming a JPEG to stdout
+            proc = subprocess.Popen(
+                [_GRIM_PATH, "-t", "jpeg", "-q", str(_JPEG_QUALITY), "-"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=0
             )
             
-            # Read the image data
-            with open(tmp_path, 'rb') as f:
-                image_data = f.read()
+            deadline = time.monotonic() + _CAPTURE_TIMEOUT
+            try:
+                size = self._read_into_buffer(proc.stdout, deadline)
+                # stdout is closed, so grim is exiting; its stderr is tiny
+                returncode = proc.wait(timeout=_CAPTURE_TIMEOUT)
+                stderr = proc.stderr.read()
+            except (TimeoutError, subprocess.TimeoutExpired):
+                # Kill grim if it hangs
+                proc.kill()
+                proc.wait()
+                raise subprocess.TimeoutExpired(proc.args, _CAPTURE_TIMEOUT)
+            finally:
+                proc.stdout.close()
+                proc.stderr.close()
             
-            # Clean up temporary file
-            Path(tmp_path).unlink(missing_ok=True)
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, proc.args, stderr=stderr)
             
-            return image_data
+            # One copy out of the reusable buffer (slicing the bytearray would copy twice)
+            with memoryview(self._buf)[:size] as data:
+                return bytes(data)
             
         except subprocess.CalledProcessError as e:
-            print(f"Failed to capture screenshot: {e.stderr}")
+            print(f"Failed to capture screenshot: {e.stderr.decode(errors='replace')}")
             return None
         except subprocess.TimeoutExpired:
             print("Screenshot capture timed out")
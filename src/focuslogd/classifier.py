@@ -1,13 +1,101 @@
+import asyncio
 import base64
+import io
+import json
 from typing import Optional, Dict, Any, List
 import os
 
-from openai import OpenAI
-from pydantic import BaseModel, Field
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+from PIL import Image
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from .http_client import SHARED_HTTP_CLIENT, make_async_http_client
+from .image_server import LocalImageServer
+
+try:
+    # SIMD-accelerated and returns str directly, skipping a bytes -> str copy
+    from pybase64 import b64encode_as_string
+except ImportError:
+    def b64encode_as_string(data: bytes) -> str:
+        return base64.b64encode(data).decode('ascii')
+
+# Low-detail vision input is 512px, so larger images only cost upload time
+MAX_IMAGE_SIZE = 768
+JPEG_QUALITY = 70
+
+# Most label names listed in a prompt; older ones are summarized as a count
+MAX_PROMPT_LABELS = 50
+
+# The SDK retries connection errors, 408/409/429 and 5xx with exponential backoff
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = 30
+
+# Errors still worth retrying later once the SDK's own retries are used up
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def _preprocess_image(image_data: bytes) -> bytes:
+    """
+    Downscale a screenshot to at most MAX_IMAGE_SIZE on its long side and
+    re-encode it as JPEG.
+    
+    Args:
+        image_data: Encoded image data as bytes
+    
+    Returns:
+        JPEG image data as bytes
+    """
+    with Image.open(io.BytesIO(image_data)) as im:
+        # Let the JPEG decoder scale down while decoding
+        im.draft("RGB", (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE))
+        im.thumbnail((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.convert("RGB").save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return buf.getvalue()
+
+
+def _image_url(image_data: bytes) -> str:
+    """Preprocess a screenshot and return it as a base64 JPEG data URL."""
+    return "data:image/jpeg;base64," + b64encode_as_string(_preprocess_image(image_data))
+
+
+def dhash(image_data: bytes) -> int:
+    """
+    Compute a 64-bit difference hash of a screenshot.
+    
+    Near-identical screens hash to values a few bits apart.
+    
+    Args:
+        image_data: Encoded image data as bytes
+    
+    Returns:
+        64-bit perceptual hash
+    """
+    with Image.open(io.BytesIO(image_data)) as im:
+        im.draft("L", (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE))
+        pixels = list(im.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    
+    # One bit per horizontally adjacent pixel pair: is the left one brighter?
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
 
 
 class ActivityClassification(BaseModel):
     """Structured response for screenshot classification."""
+    # Strict structured outputs require additionalProperties: false
+    model_config = ConfigDict(extra="forbid")
+    
     labels: List[str] = Field(
         description="List of activity labels. Can use existing labels or create new ones. Multiple labels can be assigned."
     )
@@ -16,6 +104,33 @@ class ActivityClassification(BaseModel):
     )
 
 
+class ActivityClassificationBatch(BaseModel):
+    """Structured response for classifying several screenshots in one request."""
+    model_config = ConfigDict(extra="forbid")
+    
+    classifications: List[ActivityClassification] = Field(
+        description="One classification per screenshot, in the order the screenshots were given."
+    )
+
+
+def _response_format(model: type) -> Dict[str, Any]:
+    """Build a strict json_schema response_format for a Pydantic model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": model.model_json_schema(),
+            "strict": True
+        }
+    }
+
+
+# Built once at import; chat.completions.parse() would regenerate these
+# schemas from the models on every request
+CLASSIFICATION_RESPONSE_FORMAT = _response_format(ActivityClassification)
+BATCH_RESPONSE_FORMAT = _response_format(ActivityClassificationBatch)
+
+
 class ScreenshotClassifier:
     """Classifies screenshots using OpenAI's vision API."""
     
@@ -34,8 +149,137 @@ class ScreenshotClassifier:
                 "or pass api_key parameter."
             )
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(
+            api_key=self.api_key,
+            http_client=SHARED_HTTP_CLIENT,
+            max_retries=MAX_RETRIES,
+            timeout=REQUEST_TIMEOUT
+        )
         self.model = model
+        
+        # A local endpoint (OPENAI_BASE_URL) can fetch images over loopback
+        # instead of decoding base64 data URLs
+        self._image_server = (
+            LocalImageServer() if os.getenv("FOCUSLOG_LOCAL_IMAGE_SERVER") == "1" else None
+        )
+        
+        # Invariant instructions go first so repeated requests share a prompt
+        # prefix the API can cache; only the sections after them change
+        self._prompt_prefix = """Analyze this screenshot and classify the user's activity.
+
+You can:
+- Use existing labels if they fit
+- Create new labels if needed
+- Assign MULTIPLE labels (activities can overlap, e.g., "meeting" + "reading_documentation")
+
+Provide:
+1. Labels for this activity (multiple allowed)
+2. Detailed description of what the user is doing (2-3 sentences)
+
+"""
+        self._batch_prompt_prefix = """Analyze these screenshots, taken in order a few seconds apart, and classify the user's activity in each one.
+
+You can:
+- Use existing labels if they fit
+- Create new labels if needed
+- Assign MULTIPLE labels (activities can overlap, e.g., "meeting" + "reading_documentation")
+
+Provide one classification per screenshot in the order given, each with:
+1. Labels for this activity (multiple allowed)
+2. Detailed description of what the user is doing (2-3 sentences)
+
+"""
+        self._labels_section = ([], "EXISTING LABELS: None yet - create new ones")
+    
+    def _existing_labels_section(self, existing_labels: List[str]) -> str:
+        """
+        Return the EXISTING LABELS section, rebuilding it only when the labels change.
+        
+        Only the first MAX_PROMPT_LABELS labels (callers pass them most recently
+        used first) are listed, so prompt size stays bounded as labels accumulate.
+        """
+        labels, section = self._labels_section
+        if existing_labels != labels:
+            if existing_labels:
+                section = "EXISTING LABELS: " + ", ".join(existing_labels[:MAX_PROMPT_LABELS])
+                if len(existing_labels) > MAX_PROMPT_LABELS:
+                    section += f" ({len(existing_labels) - MAX_PROMPT_LABELS} more)"
+            else:
+                section = "EXISTING LABELS: None yet - create new ones"
+            self._labels_section = (list(existing_labels), section)
+        return section
+    
+    def _image_ref(self, image_data: bytes) -> str:
+        """Preprocess a screenshot and return the URL to send for it."""
+        if self._image_server:
+            return self._image_server.register(_preprocess_image(image_data))
+        return _image_url(image_data)
+    
+    def _classify_request(
+        self,
+        image_url: str,
+        existing_labels: List[str],
+        last_summary: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the chat.completions.create arguments for one screenshot."""
+        prompt = "".join([
+            self._prompt_prefix,
+            self._existing_labels_section(existing_labels),
+            f"\n\nLAST 5-MIN SUMMARY (for context):\n{last_summary}" if last_summary else "",
+        ])
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": image_url,
+                                "detail": "low"
+                            }
+                        }
+                    ]
+                }
+            ],
+            "response_format": CLASSIFICATION_RESPONSE_FORMAT,
+        }
+    
+    def _batch_request(
+        self,
+        image_urls: List[str],
+        existing_labels: List[str],
+        last_summary: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the chat.completions.create arguments for several screenshots."""
+        prompt = "".join([
+            self._batch_prompt_prefix,
+            f"SCREENSHOTS: {len(image_urls)} (return exactly {len(image_urls)} classifications)\n\n",
+            self._existing_labels_section(existing_labels),
+            f"\n\nLAST 5-MIN SUMMARY (for context):\n{last_summary}" if last_summary else "",
+        ])
+        
+        content = [{"type": "text", "text": prompt}]
+        for image_url in image_urls:
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": image_url,
+                    "detail": "low"
+                }
+            })
+        
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": content}],
+            "response_format": BATCH_RESPONSE_FORMAT,
+        }
     
     def classify(
         self,
@@ -47,7 +291,7 @@ class ScreenshotClassifier:
         Classify a screenshot using OpenAI's vision API with structured output.
         
         Args:
-            image_data: PNG image data as bytes
+            image_data: JPEG image data as bytes
             existing_labels: List of existing label names from database
             last_summary: Last 5-minute summary for context (optional)
         
@@ -56,69 +300,178 @@ class ScreenshotClassifier:
                 - success: bool indicating if classification succeeded
                 - labels: List[str] with activity labels
                 - description: str with detailed description
-                - raw_response: str with full API response
+                - raw_response: str with the API response id, model and token usage
                 - error: str with error message (if success is False)
+                - retryable: bool, True if the error was transient (network,
+                  rate limit or server error) and a later retry may succeed
         """
         try:
-            # Encode image to base64
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
+            # Shrink and encode image as a data URL (or serve it locally)
+            image_url = self._image_ref(image_data)
             
-            # Build prompt with existing labels and context
-            prompt = f"""Analyze this screenshot and classify the user's activity.
+            # Use structured outputs with the precomputed response schema
+            completion = self.client.chat.completions.create(
+                **self._classify_request(image_url, existing_labels, last_summary)
+            )
+            return _completion_result(completion)
+        except Exception as e:
+            return _error_result(str(e), isinstance(e, TRANSIENT_ERRORS))
+    
+    def classify_batch(
+        self,
+        images: List[bytes],
+        existing_labels: List[str],
+        last_summary: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify several screenshots in a single vision API request.
+        
+        Args:
+            images: JPEG image data for each screenshot, oldest first
+            existing_labels: List of existing label names from database
+            last_summary: Last 5-minute summary for context (optional)
+        
+        Returns:
+            List of result dicts in the same order and format as classify()
+        """
+        try:
+            image_urls = [self._image_ref(image_data) for image_data in images]
+            completion = self.client.chat.completions.create(
+                **self._batch_request(image_urls, existing_labels, last_summary)
+            )
+            return _batch_results(completion, len(images))
+        except Exception as e:
+            return [_batch_error_result(e) for _ in images]
 
-EXISTING LABELS: {', '.join(existing_labels) if existing_labels else 'None yet - create new ones'}
 
-You can:
-- Use existing labels if they fit
-- Create new labels if needed
-- Assign MULTIPLE labels (activities can overlap, e.g., "meeting" + "reading_documentation")
+class AsyncScreenshotClassifier(ScreenshotClassifier):
+    """Classifies screenshots with non-blocking API calls on an asyncio event loop."""
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-5-mini"):
+        """
+        Initialize the classifier.
+        
+        Must be used from a single event loop, which owns its HTTP connections.
+        
+        Args:
+            api_key: OpenAI API key. If None, reads from OPENAI_API_KEY env variable
+            model: OpenAI model to use (default: gpt-5-mini for cost efficiency)
+        """
+        super().__init__(api_key=api_key, model=model)
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=make_async_http_client(),
+            max_retries=MAX_RETRIES,
+            timeout=REQUEST_TIMEOUT
+        )
+    
+    async def classify(
+        self,
+        image_data: bytes,
+        existing_labels: List[str],
+        last_summary: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async version of ScreenshotClassifier.classify()."""
+        try:
+            # Image work is CPU-bound, so keep it off the event loop
+            image_url = await asyncio.to_thread(self._image_ref, image_data)
+            completion = await self.client.chat.completions.create(
+                **self._classify_request(image_url, existing_labels, last_summary)
+            )
+            return _completion_result(completion)
+        except Exception as e:
+            return _error_result(str(e), isinstance(e, TRANSIENT_ERRORS))
+    
+    async def classify_batch(
+        self,
+        images: List[bytes],
+        existing_labels: List[str],
+        last_summary: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Async version of ScreenshotClassifier.classify_batch()."""
+        try:
+            image_urls = await asyncio.to_thread(
+                lambda: [self._image_ref(image_data) for image_data in images]
+            )
+            completion = await self.client.chat.completions.create(
+                **self._batch_request(image_urls, existing_labels, last_summary)
+            )
+            return _batch_results(completion, len(images))
+        except Exception as e:
+            return [_batch_error_result(e) for _ in images]
+    
+    async def aclose(self) -> None:
+        """Close the client's HTTP connections."""
+        await self.client.close()
+        if self._image_server:
+            self._image_server.close()
 
-Provide:
-1. Labels for this activity (multiple allowed)
-2. Detailed description of what the user is doing (2-3 sentences)"""
 
-            if last_summary:
-                prompt += f"\n\nLAST 5-MIN SUMMARY (for context):\n{last_summary}"
-            
-            # Use structured outputs with Pydantic via responses.parse
-            completion = self.client.beta.chat.completions.parse(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{image_base64}",
-                                    "detail": "low"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                response_format=ActivityClassification,
-            )
-            
-            result = completion.choices[0].message.parsed
-            
-            return {
+def _error_result(error: str, retryable: bool = False) -> Dict[str, Any]:
+    """Build a failed classification result."""
+    return {
+        "success": False,
+        "labels": [],
+        "description": None,
+        "raw_response": None,
+        "error": error,
+        "retryable": retryable
+    }
+
+
+def _response_metadata(completion, **extra) -> str:
+    """
+    Serialize the parts of a completion not already stored as labels/description.
+    
+    Args:
+        completion: Parsed chat completion
+        **extra: Additional fields to record
+    
+    Returns:
+        JSON string with the response id, model and token usage
+    """
+    usage = completion.usage.model_dump(exclude_none=True) if completion.usage else None
+    return json.dumps({"id": completion.id, "model": completion.model, "usage": usage, **extra})
+
+
+def _batch_error_result(error: Exception) -> Dict[str, Any]:
+    """Build the result for a screenshot whose batch request failed."""
+    # A refused or malformed batch reply may still classify one screenshot
+    # at a time, so it's retried like a transient error
+    return _error_result(str(error), isinstance(error, TRANSIENT_ERRORS + (ValidationError,)))
+
+
+def _completion_result(completion) -> Dict[str, Any]:
+    """Build a classification result from a single-screenshot completion."""
+    result = ActivityClassification.model_validate_json(completion.choices[0].message.content)
+    
+    return {
+        "success": True,
+        "labels": result.labels,
+        "description": result.description,
+        "raw_response": _response_metadata(completion),
+        "error": None
+    }
+
+
+def _batch_results(completion, count: int) -> List[Dict[str, Any]]:
+    """Split a batch completion into one classification result per screenshot."""
+    classifications = ActivityClassificationBatch.model_validate_json(
+        completion.choices[0].message.content
+    ).classifications
+    error = f"Expected {count} classifications, got {len(classifications)}"
+    
+    results = []
+    for i in range(count):
+        if i < len(classifications):
+            result = classifications[i]
+            results.append({
                 "success": True,
                 "labels": result.labels,
                 "description": result.description,
-                "raw_response": completion.model_dump_json(),
+                "raw_response": _response_metadata(completion, batch_index=i, batch_size=count),
                 "error": None
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "labels": [],
-                "description": None,
-                "raw_response": None,
-                "error": str(e)
-            }
+            })
+        else:
+            results.append(_error_result(error))
+    return results
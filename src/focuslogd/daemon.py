@@ -9,22 +9,49 @@ and stores both the screenshot and classification in a SQLite database.
 import sys
 import time
 import signal
+import asyncio
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
 from typing import Optional
 import argparse
 import os
+import subprocess
 import threading
+import traceback
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
 
 from focuslogd.capture import GrimCapture
-from focuslogd.classifier import ScreenshotClassifier
+from focuslogd.classifier import AsyncScreenshotClassifier, dhash
 from focuslogd.database import FocusLogDB
 from focuslogd.summarizer import SummaryGenerator
-from focuslogd.video_generator import VideoGenerator
+from focuslogd.video_generator import VideoGenerator, make_video_frame
+
+# Classify a partial batch once its oldest capture has waited this long (seconds)
+BATCH_MAX_AGE = 60
+
+# Screens whose perceptual hashes differ by at most this many bits count as unchanged
+DEDUP_MAX_DISTANCE = 4
+
+# Classification requests in flight at once
+MAX_CONCURRENT_CLASSIFICATIONS = 4
+
+# Delays before classifying a capture again after a transient API failure (seconds)
+RETRY_DELAYS = (30, 120, 600)
+
+# Captures held for a retry at once; further failures are saved straight away
+MAX_PENDING_RETRIES = 32
+
+# Skip captures once the session has been idle this long (seconds)
+IDLE_SKIP_AFTER = 120
+
+# Reuse a session idle/lock check for this long (seconds)
+IDLE_CHECK_CACHE = 10
 
 
 class FocusLogDaemon:
@@ -36,7 +63,10 @@ class FocusLogDaemon:
         db_path: str = "focuslog.db",
         api_key: Optional[str] = None,
         classification_prompt: Optional[str] = None,
-        model: str = "gpt-5-mini"
+        model: str = "gpt-5-mini",
+        batch_size: int = 4,
+        dedup: bool = True,
+        idle_check: bool = True
     ):
         """
         Initialize the FocusLog daemon.
@@ -47,11 +77,42 @@ class FocusLogDaemon:
             api_key: OpenAI API key (if None, reads from OPENAI_API_KEY env var)
             classification_prompt: Custom classification prompt
             model: OpenAI model to use
+            batch_size: Screenshots classified per API request (1 disables batching)
+            dedup: Reuse the last classification when the screen hasn't changed
+            idle_check: Skip captures while the session is locked or idle
         """
         self.interval = interval
+        self._stop_event = threading.Event()
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.deduped = 0
+        self.idle_check = idle_check
+        self.idle_skipped = 0
+        # (monotonic time checked, session active) from the last loginctl query
+        self._session_state = None
         self.running = False
         self.classification_prompt = classification_prompt
         
+        # Classifications run as coroutines on one event loop thread, at most
+        # MAX_CONCURRENT_CLASSIFICATIONS in flight; summaries get a worker thread
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="classify-loop", daemon=True
+        )
+        self._loop_thread.start()
+        self._classify_slots = asyncio.Semaphore(MAX_CONCURRENT_CLASSIFICATIONS)
+        # Captures waiting out a retry delay (only touched on the event loop)
+        self._retry_tasks = set()
+        self._retries_stopped = asyncio.Event()
+        self._summary_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self._pending_classifications = deque(maxlen=32)
+        self._summary_futures = {}
+        self._capture_buffer = deque()
+        # Timestamps of captures queued for classification but not saved yet
+        self._unsaved_timestamps = set()
+        self._unsaved_lock = threading.Lock()
+        self._last_classified = None  # (image hash, result) of the latest successful classification
+        
         # Initialize components
         print("Initializing FocusLog daemon...")
         
@@ -63,7 +124,7 @@ class FocusLogDaemon:
             sys.exit(1)
         
         try:
-            self.classifier = ScreenshotClassifier(api_key=api_key, model=model)
+            self.classifier = AsyncScreenshotClassifier(api_key=api_key, model=model)
             print(f"✓ OpenAI classifier initialized (model: {model})")
         except ValueError as e:
             print(f"✗ Classifier initialization failed: {e}")
@@ -77,8 +138,8 @@ class FocusLogDaemon:
             sys.exit(1)
         
         try:
-            self.video_generator = VideoGenerator(fps=30)
-            print(f"✓ Video generator initialized (30 fps)")
+            self.video_generator = VideoGenerator()
+            print(f"✓ Video generator initialized ({self.video_generator.fps} fps)")
         except RuntimeError as e:
             print(f"✗ Video generator failed: {e}")
             sys.exit(1)
@@ -107,6 +168,12 @@ class FocusLogDaemon:
         print(f"  Last 5-min summary: {self.last_5min_summary.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"  Last hourly summary: {self.last_hourly_summary.strftime('%Y-%m-%d %H:%M:%S')}")
         
+        # Classification context kept in memory instead of re-queried per capture;
+        # labels are ordered most recently used first, like get_all_labels()
+        self._labels_cache = self.db.get_all_labels()
+        self._labels_lock = threading.Lock()
+        self._last_summary_cache = last_5min['content'] if last_5min else None
+        
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -116,64 +183,286 @@ class FocusLogDaemon:
         print(f"\n\nReceived signal {signum}. Shutting down gracefully...")
         self.stop()
     
-    def _classify_and_save(
+    def _known_labels(self) -> list:
+        """Return a snapshot of the cached labels, most recently used first."""
+        with self._labels_lock:
+            return list(self._labels_cache)
+    
+    def _remember_labels(self, labels: list) -> None:
+        """Move labels just saved with a capture to the front of the label cache."""
+        with self._labels_lock:
+            used = set(labels)
+            self._labels_cache = list(dict.fromkeys(labels)) + [
+                label for label in self._labels_cache if label not in used
+            ]
+    
+    def _store_screenshot(self, screenshot_data: bytes, timestamp: datetime) -> str:
+        """Store a screenshot file along with its prescaled time-lapse frame."""
+        screenshot_path = self.db.store_screenshot(screenshot_data, timestamp)
+        self._store_video_frame(screenshot_data, screenshot_path)
+        return screenshot_path
+    
+    def _store_video_frame(self, screenshot_data: bytes, screenshot_path: str) -> None:
+        """Write the prescaled time-lapse frame for a stored screenshot."""
+        try:
+            # Identical screenshots share files, so the frame may already exist
+            if not self.db.video_frame_file(screenshot_path).exists():
+                frame = make_video_frame(screenshot_data)
+                if frame is not None:
+                    self.db.store_video_frame(frame, screenshot_path)
+        except Exception as e:
+            # Videos fall back to the full screenshot
+            print(f"  ⚠ Could not store video frame: {e}")
+    
+    def _iter_video_frames(self, start_time: datetime, end_time: datetime):
+        """Yield the JPEG time-lapse frames of captures in [start_time, end_time)."""
+        captures = self.db.iter_captures_since(
+            start_time, include_screenshots=True, until_time=end_time
+        )
+        for capture in captures:
+            if capture['screenshot_path']:
+                source = self.db.video_source_file(capture['screenshot_path'])
+                if not source.exists():
+                    print(f"  ⚠ Screenshot not found: {source}")
+                    continue
+                yield source.read_bytes()
+            elif capture['screenshot']:
+                # Legacy blobs are full-screen, so prescaling also turns the
+                # PNG ones into JPEG like every other frame
+                yield make_video_frame(capture['screenshot']) or capture['screenshot']
+    
+    async def _classify_and_save(
         self, 
         screenshot_data: bytes, 
         timestamp: datetime,
-        capture_num: int
+        capture_num: int,
+        image_hash: Optional[int] = None,
+        attempt: int = 0
     ) -> None:
-        """Classify screenshot and save to database (runs in background thread)."""
+        """Classify screenshot and save to database (runs on the event loop)."""
+        retrying = False
         try:
-            # Get existing labels and last summary for context
-            existing_labels = self.db.get_all_labels()
-            last_summary_data = self.db.get_latest_summary('5min')
-            last_summary = last_summary_data['content'] if last_summary_data else None
+            # Existing labels and last summary for context, from memory
+            existing_labels = self._known_labels()
+            last_summary = self._last_summary_cache
             
             # Classify screenshot
             print(f"[{timestamp.strftime('%H:%M:%S')}] #{capture_num} Classifying...", end=" ", flush=True)
-            result = self.classifier.classify(
+            result = await self.classifier.classify(
                 screenshot_data,
                 existing_labels=existing_labels,
                 last_summary=last_summary
             )
             
-            if result["success"]:
-                labels = result["labels"]
-                description = result["description"]
-                
-                # Display labels
-                labels_str = ", ".join(labels)
-                print(f"✓ [{labels_str}]")
-                print(f"  Description: {description[:80]}..." if len(description) > 80 else f"  Description: {description}")
-                
-                # Save to database (labels will be auto-created if new)
-                capture_id = self.db.save_capture(
-                    screenshot=screenshot_data,
-                    description=description,
-                    labels=labels,
-                    classification_raw=result["raw_response"],
-                    timestamp=timestamp
-                )
-                print(f"  → Saved to database (ID: {capture_id})")
-            else:
-                error = result["error"]
-                print(f"✗ Error: {error}")
-                
-                # Save to database with error
-                self.db.save_capture(
-                    screenshot=screenshot_data,
-                    classification_error=error,
-                    timestamp=timestamp
-                )
+            if self._schedule_retry(screenshot_data, timestamp, capture_num, image_hash, result, attempt):
+                retrying = True
+                return
+            await asyncio.to_thread(
+                self._save_classification, screenshot_data, timestamp, result, image_hash
+            )
+        except Exception as e:
+            print(f"✗ Classification thread error: {e}")
+            traceback.print_exc()
+        finally:
+            # A capture waiting for a retry stays unsaved
+            if not retrying:
+                self._release_unsaved([timestamp])
+    
+    async def _classify_batch_and_save(self, batch: list) -> None:
+        """Classify buffered screenshots in one request and save each (runs on the event loop)."""
+        retrying = []
+        try:
+            # Existing labels and last summary for context, from memory
+            existing_labels = self._known_labels()
+            last_summary = self._last_summary_cache
+            
+            first_num, last_num = batch[0][2], batch[-1][2]
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] #{first_num}-#{last_num} Classifying batch...")
+            results = await self.classifier.classify_batch(
+                [screenshot_data for screenshot_data, _, _, _ in batch],
+                existing_labels=existing_labels,
+                last_summary=last_summary
+            )
+            
+            # Results come back in capture order; transient failures are retried one by one
+            to_save = []
+            for item, result in zip(batch, results):
+                if self._schedule_retry(*item, result, 0):
+                    retrying.append(item[1])
+                else:
+                    to_save.append((item, result))
+            
+            def save_results():
+                for (screenshot_data, timestamp, capture_num, image_hash), result in to_save:
+                    print(f"  #{capture_num} [{timestamp.strftime('%H:%M:%S')}]", end=" ")
+                    self._save_classification(screenshot_data, timestamp, result, image_hash)
+            
+            await asyncio.to_thread(save_results)
         except Exception as e:
             print(f"✗ Classification thread error: {e}")
-            import traceback
             traceback.print_exc()
+        finally:
+            self._release_unsaved([
+                timestamp for _, timestamp, _, _ in batch if timestamp not in retrying
+            ])
+    
+    def _schedule_retry(
+        self,
+        screenshot_data: bytes,
+        timestamp: datetime,
+        capture_num: int,
+        image_hash: Optional[int],
+        result: dict,
+        attempt: int
+    ) -> bool:
+        """
+        Hold a capture whose classification failed transiently for another attempt.
+        
+        Runs on the event loop. Returns False, leaving the caller to save the
+        result, if it succeeded, failed permanently, used up its retries, or
+        the daemon is stopping.
+        """
+        if (result["success"] or not result.get("retryable")
+                or attempt >= len(RETRY_DELAYS)
+                or len(self._retry_tasks) >= MAX_PENDING_RETRIES
+                or not self.running):
+            return False
+        
+        delay = RETRY_DELAYS[attempt]
+        print(f"✗ Error: {result['error']}")
+        print(f"  ↻ Retrying #{capture_num} in {delay}s")
+        task = asyncio.ensure_future(self._retry_classification(
+            screenshot_data, timestamp, capture_num, image_hash, result, attempt + 1
+        ))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+        return True
+    
+    async def _retry_classification(
+        self,
+        screenshot_data: bytes,
+        timestamp: datetime,
+        capture_num: int,
+        image_hash: Optional[int],
+        last_result: dict,
+        attempt: int
+    ) -> None:
+        """Wait out the retry delay, then classify the capture again (runs on the event loop)."""
+        try:
+            await asyncio.wait_for(self._retries_stopped.wait(), RETRY_DELAYS[attempt - 1])
+        except asyncio.TimeoutError:
+            await self._run_classification(self._classify_and_save(
+                screenshot_data, timestamp, capture_num, image_hash, attempt
+            ))
+            return
+        
+        # Stopping: keep the capture with its last error rather than drop it
+        def save_result():
+            print(f"  #{capture_num} [{timestamp.strftime('%H:%M:%S')}]", end=" ")
+            self._save_classification(screenshot_data, timestamp, last_result, image_hash)
+        
+        try:
+            await asyncio.to_thread(save_result)
+        finally:
+            self._release_unsaved([timestamp])
+    
+    async def _finish_retries(self) -> None:
+        """Wake captures waiting to be retried so they save, and wait for them."""
+        self._retries_stopped.set()
+        while self._retry_tasks:
+            await asyncio.gather(*self._retry_tasks)
+    
+    def _save_classification(
+        self,
+        screenshot_data: bytes,
+        timestamp: datetime,
+        result: dict,
+        image_hash: Optional[int] = None
+    ) -> None:
+        """Report a classification result and save the capture with it."""
+        if result["success"]:
+            if image_hash is not None:
+                self._last_classified = (image_hash, result)
+            
+            labels = result["labels"]
+            description = result["description"]
+            
+            # Display labels
+            labels_str = ", ".join(labels)
+            print(f"✓ [{labels_str}]")
+            print(f"  Description: {description[:80]}..." if len(description) > 80 else f"  Description: {description}")
+            
+            # Save to database (labels will be auto-created if new)
+            capture_id = self.db.save_capture(
+                screenshot_path=self._store_screenshot(screenshot_data, timestamp),
+                description=description,
+                labels=labels,
+                classification_raw=result["raw_response"],
+                timestamp=timestamp
+            )
+            self._remember_labels(labels)
+            print(f"  → Saved to database (ID: {capture_id})")
+        else:
+            error = result["error"]
+            print(f"✗ Error: {error}")
+            
+            # Save to database with error
+            self.db.save_capture(
+                screenshot_path=self._store_screenshot(screenshot_data, timestamp),
+                classification_error=error,
+                timestamp=timestamp
+            )
+    
+    def _is_session_active(self) -> bool:
+        """
+        Check with logind whether the session is unlocked and not idle.
+        
+        The answer is cached for IDLE_CHECK_CACHE seconds. If logind can't be
+        queried the session is assumed active, so captures never stop silently.
+        """
+        now = time.monotonic()
+        if self._session_state and now - self._session_state[0] < IDLE_CHECK_CACHE:
+            return self._session_state[1]
+        
+        active = True
+        try:
+            result = subprocess.run(
+                [
+                    "loginctl", "show-session", os.environ.get("XDG_SESSION_ID", "self"),
+                    "-p", "IdleHint", "-p", "IdleSinceHintMonotonic", "-p", "LockedHint"
+                ],
+                capture_output=True,
+                text=True,
+                timeout=2
+            )
+            if result.returncode == 0:
+                props = dict(
+                    line.split("=", 1) for line in result.stdout.splitlines() if "=" in line
+                )
+                # IdleSinceHintMonotonic is CLOCK_MONOTONIC in microseconds, like time.monotonic()
+                idle_since = int(props.get("IdleSinceHintMonotonic") or 0) / 1_000_000
+                if props.get("LockedHint") == "yes":
+                    active = False
+                elif props.get("IdleHint") == "yes" and now - idle_since >= IDLE_SKIP_AFTER:
+                    active = False
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            pass
+        
+        self._session_state = (now, active)
+        return active
     
     def _capture_and_classify(self, capture_num: int) -> None:
         """Capture a screenshot and fire off classification in background."""
         timestamp = datetime.now()
         
+        # Don't capture (or pay to classify) a locked or idle screen
+        if self.idle_check and not self._is_session_active():
+            self.idle_skipped += 1
+            print(f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')}] Session locked or idle, skipping capture")
+            # No new captures will fill the buffer while idle; don't leave it waiting
+            self._flush_capture_buffer()
+            return
+        
         # Capture screenshot
         print(f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')}] Capturing screenshot...", end=" ", flush=True)
         screenshot_data = self.capture.capture()
@@ -182,37 +471,154 @@ class FocusLogDaemon:
             print("✗ Failed")
             # Still save to DB with error
             self.db.save_capture(
-                screenshot=b"",
                 classification_error="Screenshot capture failed",
                 timestamp=timestamp
             )
+            self._flush_if_stale(timestamp)
             return
         
         screenshot_size_kb = len(screenshot_data) / 1024
         print(f"✓ ({screenshot_size_kb:.1f} KB)")
         
-        # Fire off classification in background thread (non-blocking)
-        thread = threading.Thread(
-            target=self._classify_and_save,
-            args=(screenshot_data, timestamp, capture_num),
-            daemon=True
+        image_hash = None
+        if self.dedup:
+            try:
+                image_hash = dhash(screenshot_data)
+            except OSError as e:
+                print(f"  ⚠ Could not hash screenshot: {e}")
+            if image_hash is not None and self._reuse_classification(screenshot_data, timestamp, image_hash):
+                self._flush_if_stale(timestamp)
+                return
+        
+        # Saved late, once classified; summaries wait for it
+        self._hold_unsaved([timestamp])
+        
+        if self.batch_size <= 1:
+            # Queue classification on the worker pool (non-blocking)
+            self._submit_classification(
+                capture_num,
+                self._classify_and_save(screenshot_data, timestamp, capture_num, image_hash),
+                [timestamp]
+            )
+            return
+        
+        # Buffer until a full batch is ready or the oldest capture has waited too long
+        self._capture_buffer.append((screenshot_data, timestamp, capture_num, image_hash))
+        if len(self._capture_buffer) >= self.batch_size:
+            self._flush_capture_buffer()
+        else:
+            self._flush_if_stale(timestamp)
+    
+    def _reuse_classification(
+        self,
+        screenshot_data: bytes,
+        timestamp: datetime,
+        image_hash: int
+    ) -> bool:
+        """Save the capture with the last classification if the screen is essentially unchanged."""
+        last = self._last_classified
+        if last is None or (image_hash ^ last[0]).bit_count() > DEDUP_MAX_DISTANCE:
+            return False
+        
+        result = last[1]
+        screenshot_path = self.db.store_screenshot(screenshot_data, timestamp)
+        capture_id = self.db.save_capture(
+            screenshot_path=screenshot_path,
+            description=result["description"],
+            labels=result["labels"],
+            classification_raw=result["raw_response"],
+            timestamp=timestamp
+        )
+        # This runs on the capture loop, so leave the frame's JPEG decode
+        # and encode to a worker thread
+        asyncio.run_coroutine_threadsafe(
+            asyncio.to_thread(self._store_video_frame, screenshot_data, screenshot_path),
+            self._loop
+        )
+        self.deduped += 1
+        print(f"  Screen unchanged, reused last classification (ID: {capture_id})")
+        return True
+    
+    def _flush_if_stale(self, now: datetime) -> None:
+        """Flush the capture buffer once its oldest capture has waited BATCH_MAX_AGE."""
+        if self._capture_buffer and (now - self._capture_buffer[0][1]).total_seconds() >= BATCH_MAX_AGE:
+            self._flush_capture_buffer()
+    
+    def _flush_capture_buffer(self) -> None:
+        """Queue all buffered captures as one batch classification."""
+        if not self._capture_buffer:
+            return
+        batch = list(self._capture_buffer)
+        self._capture_buffer.clear()
+        self._submit_classification(
+            batch[0][2],
+            self._classify_batch_and_save(batch),
+            [timestamp for _, timestamp, _, _ in batch]
         )
-        thread.start()
     
-    def _generate_5min_summary(self) -> None:
-        """Generate a 5-minute summary in background thread."""
+    def _hold_unsaved(self, timestamps: list) -> None:
+        """Record captures that will be saved once classified."""
+        with self._unsaved_lock:
+            self._unsaved_timestamps.update(timestamps)
+    
+    def _release_unsaved(self, timestamps: list) -> None:
+        """Record captures as saved (or dropped), letting summaries cover them."""
+        with self._unsaved_lock:
+            self._unsaved_timestamps.difference_update(timestamps)
+    
+    def _saved_until(self, now: datetime) -> datetime:
+        """
+        Latest time summaries can end at without missing a capture.
+        
+        Captures are saved after classification with their capture timestamps,
+        so a window ending at now would miss ones still being classified.
+        """
+        with self._unsaved_lock:
+            return min([now, *self._unsaved_timestamps])
+    
+    async def _run_classification(self, coro) -> None:
+        """Await a classification coroutine once a concurrency slot is free."""
+        async with self._classify_slots:
+            await coro
+    
+    def _submit_classification(self, capture_num: int, coro, timestamps: list) -> None:
+        """Schedule a classification coroutine, dropping the oldest one if the backlog is full."""
+        pending = self._pending_classifications
+        while pending and pending[0][1].done():
+            pending.popleft()
+        
+        if len(pending) == pending.maxlen:
+            oldest_num, oldest, oldest_timestamps = pending.popleft()
+            if oldest.cancel():
+                print(f"  ⚠ Classification backlog full, dropped capture #{oldest_num}")
+                # A coroutine cancelled before it started never releases its captures
+                self._release_unsaved(oldest_timestamps)
+        
+        future = asyncio.run_coroutine_threadsafe(self._run_classification(coro), self._loop)
+        pending.append((capture_num, future, timestamps))
+    
+    def _submit_summary(self, summary_type: str, fn) -> None:
+        """Queue a summary job unless one of the same type is still pending."""
+        future = self._summary_futures.get(summary_type)
+        if future is not None and not future.done():
+            return
+        self._summary_futures[summary_type] = self._summary_pool.submit(fn)
+    
+    def _generate_5min_summary(self, end_time: datetime) -> None:
+        """Generate a 5-minute summary of captures before end_time in background thread."""
         try:
-            now = datetime.now()
             start_time = self.last_5min_summary
             
-            print(f"\n5min {start_time.isoformat()} → {now.isoformat()}")
+            print(f"\n5min {start_time.isoformat()} → {end_time.isoformat()}")
             
             # Get captures from last 5 minutes
-            captures = self.db.get_captures_since(start_time, include_screenshots=False)
+            captures = self.db.get_captures_since(
+                start_time, include_screenshots=False, until_time=end_time
+            )
             
             if not captures:
                 print("  No captures to summarize")
-                self.last_5min_summary = now
+                self.last_5min_summary = end_time
                 return
             
             # Generate summary
@@ -228,22 +634,22 @@ class FocusLogDaemon:
             summary_id = self.db.save_summary(
                 summary_type='5min',
                 start_time=start_time,
-                end_time=now,
+                end_time=end_time,
                 content=summary
             )
             
             print(f"  ✓ 5-min summary saved (ID: {summary_id})")
             print(f"  Summary: {summary[:100]}..." if len(summary) > 100 else f"  Summary: {summary}")
             
-            self.last_5min_summary = now
+            self._last_summary_cache = summary
+            self.last_5min_summary = end_time
             
         except Exception as e:
             print(f"  ✗ Error generating 5-min summary: {e}")
-            import traceback
             traceback.print_exc()
     
-    def _generate_hourly_summary(self) -> None:
-        """Generate an hourly summary and video in background thread."""
+    def _generate_hourly_summary(self, end_time: datetime) -> None:
+        """Generate an hourly summary and video up to end_time in background thread."""
         try:
             now = datetime.now()
             start_time = self.last_hourly_summary
@@ -254,12 +660,12 @@ class FocusLogDaemon:
             five_min_summaries = self.db.get_summaries_in_range(
                 summary_type='5min',
                 start_time=start_time,
-                end_time=now
+                end_time=end_time
             )
             
             if not five_min_summaries:
                 print("  No 5-min summaries to aggregate")
-                self.last_hourly_summary = now
+                self.last_hourly_summary = end_time
                 return
             
             # Generate text summary
@@ -271,52 +677,55 @@ class FocusLogDaemon:
                 # Don't update last_hourly_summary on failure - will retry next time
                 return
             
-            # Generate video from captures
-            captures = self.db.get_captures_since(start_time, include_screenshots=True)
+            # Generate video from captures, streamed from the database
             video_path = None
             
-            if captures:
-                print(f"  Creating video from {len(captures)} captures...")
+            # Screenshot files go to ffmpeg as they are
+            screenshot_paths = []
+            has_blobs = False
+            captures = self.db.iter_captures_since(
+                start_time, include_screenshots=True, until_time=end_time
+            )
+            for capture in captures:
+                if capture['screenshot_path']:
+                    screenshot_paths.append(str(self.db.video_source_file(capture['screenshot_path']).resolve()))
+                elif capture['screenshot']:
+                    has_blobs = True
+                    captures.close()
+                    break
+            
+            if screenshot_paths or has_blobs:
+                # Generate video filename
+                video_filename = f"focuslog_{start_time.strftime('%Y%m%d_%H%M%S')}.mp4"
+                video_path_full = self.videos_dir / video_filename
                 
-                # Save screenshots to temp files for ffmpeg
-                import tempfile
-                temp_dir = Path(tempfile.mkdtemp(prefix="focuslog_"))
-                screenshot_paths = []
+                # Create video
+                if has_blobs:
+                    # Captures from before screenshots moved to disk only exist
+                    # as database blobs; pipe them to ffmpeg instead of staging files
+                    print(f"  Creating video from database captures...")
+                    success = self.video_generator.generate_video_from_bytes(
+                        self._iter_video_frames(start_time, end_time),
+                        str(video_path_full)
+                    )
+                else:
+                    print(f"  Creating video from {len(screenshot_paths)} captures...")
+                    success = self.video_generator.generate_video(
+                        screenshot_paths,
+                        str(video_path_full)
+                    )
                 
-                try:
-                    for i, capture in enumerate(captures):
-                        if capture.get('screenshot'):
-                            temp_path = temp_dir / f"capture_{i:05d}.png"
-                            temp_path.write_bytes(capture['screenshot'])
-                            screenshot_paths.append(str(temp_path))
-                    
-                    if screenshot_paths:
-                        # Generate video filename
-                        video_filename = f"focuslog_{start_time.strftime('%Y%m%d_%H%M%S')}.mp4"
-                        video_path_full = self.videos_dir / video_filename
-                        
-                        # Create video
-                        success = self.video_generator.generate_video(
-                            screenshot_paths,
-                            str(video_path_full)
-                        )
-                        
-                        if success:
-                            video_path = str(video_path_full)
-                            print(f"  ✓ Video saved: {video_path}")
-                        else:
-                            print(f"  ✗ Video generation failed")
-                    
-                finally:
-                    # Cleanup temp files
-                    import shutil
-                    shutil.rmtree(temp_dir, ignore_errors=True)
+                if success:
+                    video_path = str(video_path_full)
+                    print(f"  ✓ Video saved: {video_path}")
+                else:
+                    print(f"  ✗ Video generation failed")
             
             # Save summary to database
             summary_id = self.db.save_summary(
                 summary_type='hourly',
                 start_time=start_time,
-                end_time=now,
+                end_time=end_time,
                 content=summary,
                 video_path=video_path
             )
@@ -326,37 +735,38 @@ class FocusLogDaemon:
             
             # Cleanup screenshots - keep only 1 per 5 minutes
             print(f"  Cleaning up screenshots (keeping 1 per 5 minutes)...")
-            cleanup_result = self.db.cleanup_screenshots_except_thumbnails(start_time, now)
+            cleanup_result = self.db.cleanup_screenshots_except_thumbnails(start_time, end_time)
             print(f"  ✓ Kept {cleanup_result['kept']} thumbnails, removed {cleanup_result['deleted']} screenshots")
             
-            self.last_hourly_summary = now
+            # Fold the hour's writes back into the database file, without
+            # waiting on dashboard readers
+            self.db.checkpoint()
+            
+            self.last_hourly_summary = end_time
             
         except Exception as e:
             print(f"  ✗ Error generating hourly summary: {e}")
-            import traceback
             traceback.print_exc()
     
     def _check_and_generate_summaries(self) -> None:
         """Check if it's time to generate summaries and fire them off."""
-        now = datetime.now()
+        # Send buffered captures off now rather than hold the summary back for them
+        if (datetime.now() - self.last_5min_summary).total_seconds() >= 300:
+            self._flush_capture_buffer()
+        
+        # Summaries cover [last end, end_time); captures still being classified
+        # land in a later window instead of being skipped
+        end_time = self._saved_until(datetime.now())
         
         # Check for 5-minute summary (every 5 minutes)
-        time_since_5min = (now - self.last_5min_summary).total_seconds()
+        time_since_5min = (end_time - self.last_5min_summary).total_seconds()
         if time_since_5min >= 300:  # 5 minutes = 300 seconds
-            thread = threading.Thread(
-                target=self._generate_5min_summary,
-                daemon=True
-            )
-            thread.start()
+            self._submit_summary('5min', partial(self._generate_5min_summary, end_time))
         
         # Check for hourly summary (every 60 minutes)
-        time_since_hourly = (now - self.last_hourly_summary).total_seconds()
+        time_since_hourly = (end_time - self.last_hourly_summary).total_seconds()
         if time_since_hourly >= 3600:  # 60 minutes = 3600 seconds
-            thread = threading.Thread(
-                target=self._generate_hourly_summary,
-                daemon=True
-            )
-            thread.start()
+            self._submit_summary('hourly', partial(self._generate_hourly_summary, end_time))
     
     def run(self) -> None:
         """Start the daemon main loop."""
@@ -376,23 +786,31 @@ class FocusLogDaemon:
             print(f"Date range: {stats['first_capture']} to {stats['last_capture']}\n")
         
         iteration = 0
-        next_capture_time = time.time()
+        # Scheduled on the monotonic clock so wall-clock jumps don't shift captures
+        next_capture_time = time.monotonic()
         
         while self.running:
             try:
                 iteration += 1
                 
-                # Wait until it's time for the next capture
-                now = time.time()
+                # Wait until it's time for the next capture; stop() wakes us immediately
+                now = time.monotonic()
                 if now < next_capture_time:
                     sleep_time = next_capture_time - now
                     print(f"Waiting {sleep_time:.1f} seconds until next capture...")
-                    time.sleep(sleep_time)
+                    if self._stop_event.wait(sleep_time):
+                        break
                 
                 print(f"\n--- Capture #{iteration} ---")
                 
-                # Schedule next capture BEFORE processing (ensures exact intervals)
-                next_capture_time = time.time() + self.interval
+                # Schedule next capture BEFORE processing, from the previous slot rather
+                # than the current time so delays don't accumulate into drift
+                next_capture_time += self.interval
+                now = time.monotonic()
+                if next_capture_time < now:
+                    # Fell more than an interval behind (e.g. after suspend): skip missed slots
+                    missed = int((now - next_capture_time) // self.interval) + 1
+                    next_capture_time += missed * self.interval
                 
                 # Capture and classify (classification happens in background thread)
                 self._capture_and_classify(iteration)
@@ -402,20 +820,36 @@ class FocusLogDaemon:
                     
             except Exception as e:
                 print(f"Unexpected error in main loop: {e}")
-                import traceback
                 traceback.print_exc()
-                # Still maintain the schedule even on error
-                next_capture_time = time.time() + self.interval
     
     def stop(self) -> None:
         """Stop the daemon."""
         self.running = False
+        self._stop_event.set()
         print("\nStopping daemon...")
         
+        # Let queued classifications and summaries finish before closing the database
+        print("Waiting for background work to finish...")
+        self._flush_capture_buffer()
+        for _, future, _ in list(self._pending_classifications):
+            try:
+                future.result()
+            except CancelledError:
+                pass
+        asyncio.run_coroutine_threadsafe(self._finish_retries(), self._loop).result()
+        
+        # Close the classifier's connections on its own loop, then stop the loop
+        asyncio.run_coroutine_threadsafe(self.classifier.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._summary_pool.shutdown(wait=True)
+        
         # Show final stats
         stats = self.db.get_statistics()
         print(f"\nFinal statistics:")
         print(f"  Total captures: {stats['total_captures']}")
+        print(f"  Reused classifications: {self.deduped}")
+        print(f"  Skipped while idle: {self.idle_skipped}")
         print(f"  Database size: {stats['total_size_mb']} MB")
         
         self.db.close()
@@ -455,6 +889,22 @@ def main():
         type=str,
         help="Path to file containing custom classification prompt"
     )
+    parser.add_argument(
+        "-b", "--batch-size",
+        type=int,
+        default=4,
+        help="Screenshots classified per API request, 1 disables batching (default: 4)"
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Classify every screenshot, even when the screen hasn't changed"
+    )
+    parser.add_argument(
+        "--no-idle-check",
+        action="store_true",
+        help="Keep capturing while the session is locked or idle"
+    )
     
     args = parser.parse_args()
     
@@ -474,7 +924,10 @@ def main():
         db_path=args.database,
         api_key=args.api_key,
         classification_prompt=classification_prompt,
-        model=args.model
+        model=args.model,
+        batch_size=args.batch_size,
+        dedup=not args.no_dedup,
+        idle_check=not args.no_idle_check
     )
     
     daemon.run()
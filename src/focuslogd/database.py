@@ -1,29 +1,264 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from hashlib import sha1
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import json
+import os
+import queue
+import tempfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Every zstd frame starts with this magic number; plain JSON text never does
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Read-only connections kept for queries, so reads don't queue behind writes
+READ_POOL_SIZE = 4
+
+# Subdirectory of screenshots_dir holding the prescaled time-lapse frames,
+# laid out like the screenshots themselves
+VIDEO_FRAMES_DIR = "frames"
+
+# Prepared statements sqlite3 keeps per connection (CPython's default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Capture columns returned by the list getters. Choosing between fixed
+# strings keeps the SQL text stable, so prepared statements are reused.
+CAPTURE_COLUMNS = "id, timestamp, screenshot_path, description, classification_raw, classification_error, created_at"
+CAPTURE_COLUMNS_WITH_SCREENSHOT = "id, timestamp, screenshot, screenshot_path, description, classification_raw, classification_error, created_at"
+
+
+def compress_raw(raw: Optional[str]):
+    """Compress a raw classifier response for storage (left as text without zstandard)."""
+    if raw is None or zstandard is None:
+        return raw
+    return zstandard.ZstdCompressor(level=3).compress(raw.encode())
+
+
+def decompress_raw(value):
+    """Return a stored raw classifier response as text, compressed or not."""
+    if isinstance(value, bytes) and value.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read compressed classifier responses")
+        return zstandard.ZstdDecompressor().decompress(value).decode()
+    return value
+
+
+def _capture_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Convert a captures row to a dict, decompressing classification_raw."""
+    capture = dict(row)
+    if 'classification_raw' in capture:
+        capture['classification_raw'] = decompress_raw(capture['classification_raw'])
+    return capture
+
+
+def _timestamp_range(since_time: datetime, until_time: Optional[datetime]):
+    """WHERE clause and parameters for captures in [since_time, until_time)."""
+    if until_time is None:
+        return "timestamp >= ?", (since_time.isoformat(),)
+    return "timestamp >= ? AND timestamp < ?", (since_time.isoformat(), until_time.isoformat())
+
+
+def _jpeg_bytes(directory: str) -> int:
+    """Total size of the .jpg files under a directory."""
+    total = 0
+    for entry in os.scandir(directory):
+        if entry.is_dir(follow_symlinks=False):
+            total += _jpeg_bytes(entry.path)
+        elif entry.name.endswith(".jpg"):
+            total += entry.stat().st_size
+    return total
 
 
 class FocusLogDB:
     """SQLite database for storing screenshots and classifications."""
     
-    def __init__(self, db_path: str = "focuslog.db"):
+    def __init__(
+        self,
+        db_path: str = "focuslog.db",
+        screenshots_dir: Optional[str] = None,
+        read_only: bool = False,
+        read_pool_size: Optional[int] = None
+    ):
         """
         Initialize the database connection.
         
         Args:
             db_path: Path to the SQLite database file
+            screenshots_dir: Directory for screenshot files
+                (default: 'screenshots' next to the database)
+            read_only: Open an existing database for queries only, on a single
+                read-only connection (for the viewers)
+            read_pool_size: Read-only connections kept for queries (default:
+                READ_POOL_SIZE, or none in read_only mode, where queries share
+                the one connection)
         """
         self.db_path = db_path
+        self.read_only = read_only
+        if read_pool_size is None:
+            read_pool_size = 0 if read_only else READ_POOL_SIZE
+        if db_path == ":memory:":
+            # Every connection to :memory: is a separate database
+            read_pool_size = 0
+        self._read_pool_size = read_pool_size
+        self.screenshots_dir = (
+            Path(screenshots_dir) if screenshots_dir
+            else Path(db_path).parent / "screenshots"
+        )
         self.conn: Optional[sqlite3.Connection] = None
+        # Serializes write transactions from the daemon's worker threads
+        self._write_lock = threading.RLock()
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        # Pooled connection each thread currently has borrowed, if any
+        self._borrowed = threading.local()
+        
+        if read_only:
+            # No schema setup: the database must already exist
+            self.conn = self._connect_read_only()
+            self._open_read_pool()
+            self._label_ids: Dict[str, int] = {}
+            return
+        
         self._connect()
         self._create_tables()
+        self._open_read_pool()
+        # Label name -> id; labels are never deleted, so entries stay valid
+        self._label_ids: Dict[str, int] = {
+            row['name']: row['id'] for row in self.conn.execute("SELECT id, name FROM labels")
+        }
     
     def _connect(self) -> None:
         """Establish database connection."""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Autocommit mode: multi-statement writes are grouped with transaction()
+        self.conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
         self.conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            # WAL with synchronous=NORMAL only fsyncs at checkpoints, not on every
+            # commit, and lets readers (the dashboard) run alongside the daemon
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA wal_autocheckpoint=1000")
+            self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-20000")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        # Refresh planner statistics that have gone stale since the last open
+        self.conn.execute("PRAGMA optimize=0x10002")
+    
+    def _connect_read_only(self) -> sqlite3.Connection:
+        """Open a read-only connection tuned for queries."""
+        # Not immutable=1: the daemon may be writing, and an immutable
+        # connection would read its half-checkpointed pages unlocked
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        return conn
+    
+    def _open_read_pool(self) -> None:
+        """Open the read-only connections for the query methods."""
+        for _ in range(self._read_pool_size):
+            self._read_pool.put(self._connect_read_only())
+    
+    @contextmanager
+    def read_connection(self):
+        """
+        Borrow a read-only connection from the pool for a block of queries.
+        
+        Blocks while every pooled connection is in use. Nested calls on the
+        same thread reuse the connection it already holds, so a caller can
+        keep one for a whole request and still call the query methods.
+        Falls back to the main connection when there is no pool.
+        
+        Yields:
+            sqlite3.Connection: Connection to execute the queries on
+        """
+        held = getattr(self._borrowed, 'conn', None)
+        if held is not None:
+            yield held
+            return
+        if not self._read_pool_size:
+            yield self.conn
+            return
+        conn = self._read_pool.get()
+        self._borrowed.conn = conn
+        try:
+            yield conn
+        finally:
+            self._borrowed.conn = None
+            self._read_pool.put(conn)
+    
+    @contextmanager
+    def _reader(self):
+        """
+        Borrow a read-only connection for a block of queries (see read_connection()).
+        
+        Yields:
+            sqlite3.Cursor: Cursor to execute the queries with
+        """
+        with self.read_connection() as conn:
+            yield conn.cursor()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of writes as one transaction.
+        
+        Commits when the block finishes and rolls back if it raises.
+        
+        Yields:
+            sqlite3.Cursor: Cursor to execute the writes with
+        """
+        with self._write_lock:
+            # Take the write lock up front: a deferred transaction that reads
+            # first can fail with SQLITE_BUSY when it later tries to write
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn.cursor()
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+    
+    def checkpoint(self, mode: str = "PASSIVE") -> None:
+        """
+        Copy the WAL back into the database, bounding its size.
+        
+        Runs on a connection of its own, so writes on the shared connection
+        never queue behind it.
+        
+        Args:
+            mode: PASSIVE (default) copies what it can without waiting on
+                readers or writers; TRUNCATE waits for them, then empties the WAL
+        """
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        if self.db_path != ":memory:":
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            try:
+                conn.execute(f"PRAGMA wal_checkpoint({mode})")
+            finally:
+                conn.close()
     
     def _create_tables(self) -> None:
         """Create necessary database tables if they don't exist."""
@@ -48,20 +283,55 @@ class FocusLogDB:
                 description TEXT,
                 classification_raw TEXT,
                 classification_error TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                screenshot_path TEXT
             )
         """)
         
-        # Junction table for captures to labels (many-to-many)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS captures_labels (
+        # Screenshots are stored as files; older databases only have the blob column
+        cursor.execute("PRAGMA table_info(captures)")
+        if 'screenshot_path' not in {row['name'] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE captures ADD COLUMN screenshot_path TEXT")
+        
+        # Junction table for captures to labels (many-to-many). WITHOUT ROWID
+        # stores rows in the primary key b-tree itself instead of a rowid
+        # table plus a separate primary key index.
+        captures_labels_ddl = """
+            CREATE TABLE IF NOT EXISTS {table} (
                 capture_id INTEGER NOT NULL,
                 label_id INTEGER NOT NULL,
                 PRIMARY KEY (capture_id, label_id),
                 FOREIGN KEY (capture_id) REFERENCES captures(id) ON DELETE CASCADE,
                 FOREIGN KEY (label_id) REFERENCES labels(id) ON DELETE CASCADE
-            )
-        """)
+            ) WITHOUT ROWID
+        """
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'captures_labels'"
+        )
+        row = cursor.fetchone()
+        # Renaming captures while this table existed (migrate_db.py used to)
+        # left its foreign key pointing at the renamed, since dropped, table
+        fk_targets = {
+            fk['table'] for fk in cursor.execute("PRAGMA foreign_key_list(captures_labels)")
+        }
+        if row and ('WITHOUT ROWID' not in row['sql'].upper()
+                    or fk_targets != {'captures', 'labels'}):
+            # Older databases have a rowid table or a dangling foreign key;
+            # rebuild it in place
+            with self.transaction() as cursor:
+                cursor.execute(captures_labels_ddl.format(table="captures_labels_new"))
+                # Foreign keys weren't enforced before, so skip orphaned links
+                # instead of failing the copy
+                cursor.execute("""
+                    INSERT INTO captures_labels_new
+                    SELECT capture_id, label_id FROM captures_labels
+                    WHERE capture_id IN (SELECT id FROM captures)
+                      AND label_id IN (SELECT id FROM labels)
+                """)
+                cursor.execute("DROP TABLE captures_labels")
+                cursor.execute("ALTER TABLE captures_labels_new RENAME TO captures_labels")
+        else:
+            cursor.execute(captures_labels_ddl.format(table="captures_labels"))
         
         # Summaries table for 5-min, hourly summaries
         cursor.execute("""
@@ -76,18 +346,44 @@ class FocusLogDB:
             )
         """)
         
-        # Index on timestamp for faster queries
+        # Covering index: range scans by time get id (the rowid) and description
+        # without touching the table
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_captures_timestamp 
-            ON captures(timestamp)
+            CREATE INDEX IF NOT EXISTS idx_captures_ts_cover
+            ON captures(timestamp, description)
         """)
+        cursor.execute("DROP INDEX IF EXISTS idx_captures_timestamp")
         
+        # Range reads of one summary type (the hour's 5-min summaries, a day's
+        # hourly summaries) seek straight to the type and walk start_time in order
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_summaries_time 
-            ON summaries(start_time, end_time, summary_type)
+            CREATE INDEX IF NOT EXISTS idx_summaries_type_start
+            ON summaries(summary_type, start_time, end_time)
         """)
+        cursor.execute("DROP INDEX IF EXISTS idx_summaries_time")
         
-        self.conn.commit()
+        # Covering index so label joins/aggregations never touch the table
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_captures_labels_label
+            ON captures_labels(label_id, capture_id)
+        """)
+        
+        # Latest-summaries lookups walk these indexes instead of sorting
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_summaries_type_end
+            ON summaries(summary_type, end_time DESC)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_summaries_end_time
+            ON summaries(end_time DESC)
+        """)
+        
+        # Covering index so get_all_labels() reads labels in order without sorting
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_labels_last_used
+            ON labels(last_used DESC, name)
+        """)
     
     def get_or_create_label(self, label_name: str) -> int:
         """
@@ -99,28 +395,33 @@ class FocusLogDB:
         Returns:
             int: Label ID
         """
-        cursor = self.conn.cursor()
-        
-        # Try to get existing label
-        cursor.execute("SELECT id FROM labels WHERE name = ?", (label_name,))
-        row = cursor.fetchone()
-        
-        if row:
-            # Update last_used timestamp
-            cursor.execute(
-                "UPDATE labels SET last_used = ? WHERE id = ?",
-                (datetime.now().isoformat(), row['id'])
-            )
-            self.conn.commit()
-            return row['id']
+        with self.transaction() as cursor:
+            label_id = self._get_or_create_label(cursor, label_name)
+        self._label_ids[label_name] = label_id
+        return label_id
+    
+    def _get_or_create_label(self, cursor: sqlite3.Cursor, label_name: str) -> int:
+        """get_or_create_label() without committing, for use inside a larger transaction."""
+        now = datetime.now().isoformat()
+        
+        # Touch an existing label and get its id in one statement. Not an
+        # upsert: ON CONFLICT would burn an AUTOINCREMENT id on every hit.
+        # fetchall() runs RETURNING statements to completion so they don't
+        # stay active in the transaction.
+        cursor.execute(
+            "UPDATE labels SET last_used = ? WHERE name = ? RETURNING id",
+            (now, label_name)
+        )
+        rows = cursor.fetchall()
+        if rows:
+            return rows[0]['id']
         
-        # Create new label
+        # Create new label, with last_used in the same format updates write
         cursor.execute(
-            "INSERT INTO labels (name) VALUES (?)",
-            (label_name,)
+            "INSERT INTO labels (name, last_used) VALUES (?, ?) RETURNING id",
+            (label_name, now)
         )
-        self.conn.commit()
-        return cursor.lastrowid
+        return cursor.fetchall()[0]['id']
     
     def get_all_labels(self) -> List[str]:
         """
@@ -129,16 +430,104 @@ class FocusLogDB:
         Returns:
             List of label names, ordered by most recently used
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT name FROM labels 
-            ORDER BY last_used DESC
-        """)
-        return [row['name'] for row in cursor.fetchall()]
+        with self._reader() as cursor:
+            cursor.execute("""
+                SELECT name FROM labels 
+                ORDER BY last_used DESC
+            """)
+            return [row['name'] for row in cursor.fetchall()]
+    
+    def store_screenshot(self, screenshot: bytes, timestamp: datetime) -> str:
+        """
+        Write screenshot data to a content-addressed file under screenshots_dir.
+        
+        Identical screenshots taken on the same day share one file.
+        
+        Args:
+            screenshot: JPEG image data as bytes
+            timestamp: Capture timestamp, used for the date directories
+        
+        Returns:
+            str: Path of the file relative to screenshots_dir
+        """
+        relative_path = Path(
+            timestamp.strftime("%Y/%m/%d"), f"{sha1(screenshot).hexdigest()}.jpg"
+        )
+        path = self.screenshots_dir / relative_path
+        
+        if not path.exists():
+            self._write_file(path, screenshot)
+        
+        return relative_path.as_posix()
+    
+    def store_video_frame(self, frame: bytes, screenshot_path: str) -> None:
+        """
+        Write the prescaled time-lapse frame for a stored screenshot.
+        
+        Args:
+            frame: JPEG image data as bytes
+            screenshot_path: Path returned by store_screenshot()
+        """
+        self._write_file(self.video_frame_file(screenshot_path), frame)
+    
+    @staticmethod
+    def _write_file(path: Path, data: bytes) -> None:
+        """Write a file atomically, creating its directory if needed."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so readers never see a partial image
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    def screenshot_file(self, screenshot_path: str) -> Path:
+        """
+        Resolve a stored screenshot_path to its file.
+        
+        Args:
+            screenshot_path: Path as stored in the captures table
+        
+        Returns:
+            Path: Location of the screenshot file
+        """
+        return self.screenshots_dir / screenshot_path
+    
+    def video_frame_file(self, screenshot_path: str) -> Path:
+        """
+        Resolve a stored screenshot_path to its prescaled time-lapse frame.
+        
+        The file only exists for screenshots wider than a video frame.
+        
+        Args:
+            screenshot_path: Path as stored in the captures table
+        
+        Returns:
+            Path: Location of the frame file
+        """
+        return self.screenshots_dir / VIDEO_FRAMES_DIR / screenshot_path
+    
+    def video_source_file(self, screenshot_path: str) -> Path:
+        """
+        Resolve a stored screenshot_path to the file to use as its time-lapse frame.
+        
+        Args:
+            screenshot_path: Path as stored in the captures table
+        
+        Returns:
+            Path: The prescaled frame, or the screenshot for captures without one
+        """
+        frame_file = self.video_frame_file(screenshot_path)
+        if frame_file.exists():
+            return frame_file
+        return self.screenshot_file(screenshot_path)
     
     def save_capture(
         self,
-        screenshot: bytes,
+        screenshot_path: Optional[str] = None,
         description: Optional[str] = None,
         labels: Optional[List[str]] = None,
         classification_raw: Optional[str] = None,
@@ -149,10 +538,11 @@ class FocusLogDB:
         Save a screenshot capture with labels and description to the database.
         
         Args:
-            screenshot: PNG image data as bytes
+            screenshot_path: Screenshot file from store_screenshot(), or None if
+                the capture failed
             description: Detailed description of what user is doing
             labels: List of label names to attach to this capture
-            classification_raw: Raw JSON response from classifier
+            classification_raw: Raw JSON response from classifier (stored compressed)
             classification_error: Error message if classification failed
             timestamp: Capture timestamp (defaults to now)
         
@@ -162,31 +552,55 @@ class FocusLogDB:
         if timestamp is None:
             timestamp = datetime.now()
         
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO captures 
-            (timestamp, screenshot, description, classification_raw, classification_error)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            timestamp.isoformat(),
-            screenshot,
-            description,
-            classification_raw,
-            classification_error
-        ))
-        
-        capture_id = cursor.lastrowid
-        
-        # Add labels if provided
-        if labels:
-            for label_name in labels:
-                label_id = self.get_or_create_label(label_name)
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO captures 
+                (timestamp, screenshot, screenshot_path, description, classification_raw, classification_error)
+                VALUES (?, X'', ?, ?, ?, ?)
+                RETURNING id
+            """, (
+                timestamp.isoformat(),
+                screenshot_path,
+                description,
+                compress_raw(classification_raw),
+                classification_error
+            ))
+            
+            capture_id = cursor.fetchall()[0]['id']
+            
+            # Add labels if provided, committing once with the capture.
+            # Only labels missing from the id cache are looked up by name.
+            created = {}
+            if labels:
+                names = list(dict.fromkeys(labels))
+                now = datetime.now().isoformat()
+                new_names = [name for name in names if name not in self._label_ids]
+                if new_names:
+                    # NOT EXISTS rather than OR IGNORE, which would burn an
+                    # AUTOINCREMENT id for every label that already exists
+                    cursor.executemany("""
+                        INSERT INTO labels (name, last_used)
+                        SELECT ?1, ?2 WHERE NOT EXISTS (SELECT 1 FROM labels WHERE name = ?1)
+                    """, [(name, now) for name in new_names])
+                    cursor.execute("""
+                        SELECT id, name FROM labels
+                        WHERE name IN (SELECT value FROM json_each(?))
+                    """, (json.dumps(new_names),))
+                    created = {row['name']: row['id'] for row in cursor}
+                
+                # Ids are bound as one JSON array so the SQL text never changes
+                ids_json = json.dumps([self._label_ids.get(name) or created[name] for name in names])
+                cursor.execute("""
+                    UPDATE labels SET last_used = ?
+                    WHERE id IN (SELECT value FROM json_each(?))
+                """, (now, ids_json))
                 cursor.execute("""
                     INSERT OR IGNORE INTO captures_labels (capture_id, label_id)
-                    VALUES (?, ?)
-                """, (capture_id, label_id))
+                    SELECT ?, value FROM json_each(?)
+                """, (capture_id, ids_json))
         
-        self.conn.commit()
+        # Cache new ids only once they're committed
+        self._label_ids.update(created)
         return capture_id
     
     def save_summary(
@@ -210,14 +624,83 @@ class FocusLogDB:
         Returns:
             int: ID of the inserted summary
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO summaries (summary_type, start_time, end_time, content, video_path)
-            VALUES (?, ?, ?, ?, ?)
-        """, (summary_type, start_time.isoformat(), end_time.isoformat(), content, video_path))
+        # In a transaction, so it can't join another thread's open one
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO summaries (summary_type, start_time, end_time, content, video_path)
+                VALUES (?, ?, ?, ?, ?)
+                RETURNING id
+            """, (summary_type, start_time.isoformat(), end_time.isoformat(), content, video_path))
+            # Run the statement to completion before the commit
+            return cursor.fetchall()[0]['id']
+    
+    def save_summaries(self, summaries: List[tuple]) -> None:
+        """
+        Save many summaries in a single transaction.
         
-        self.conn.commit()
-        return cursor.lastrowid
+        Args:
+            summaries: List of (summary_type, start_time, end_time, content) tuples
+        """
+        rows = [
+            (summary_type, start_time.isoformat(), end_time.isoformat(), content)
+            for summary_type, start_time, end_time, content in summaries
+        ]
+        with self.transaction() as cursor:
+            cursor.executemany("""
+                INSERT INTO summaries (summary_type, start_time, end_time, content)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+    
+    def save_hourly_rollups(self, capture_interval: int = 15) -> List[Dict[str, Any]]:
+        """
+        Save a deterministic hourly summary for every hour that has captures.
+        
+        Capture and per-label counts are aggregated by SQLite in a single
+        INSERT ... SELECT, so no rows are pulled into Python and no API calls
+        are made.
+        
+        Args:
+            capture_interval: Seconds each capture represents (default: 15)
+        
+        Returns:
+            List of inserted summaries with 'id', 'start_time' and 'content'
+        """
+        with self.transaction() as cursor:
+            cursor.execute("""
+                WITH hours AS (
+                    SELECT strftime('%Y-%m-%dT%H:00:00', timestamp) AS hour,
+                           COUNT(*) AS captures
+                    FROM captures
+                    GROUP BY hour
+                ),
+                label_counts AS (
+                    SELECT strftime('%Y-%m-%dT%H:00:00', c.timestamp) AS hour,
+                           l.name, COUNT(*) AS count
+                    FROM captures c
+                    JOIN captures_labels cl ON cl.capture_id = c.id
+                    JOIN labels l ON l.id = cl.label_id
+                    GROUP BY hour, l.id
+                    ORDER BY hour, count DESC, l.name
+                ),
+                hour_labels AS (
+                    SELECT hour,
+                           group_concat(printf('%s %.1f min', name, count * :interval / 60.0), ', ') AS labels
+                    FROM label_counts
+                    GROUP BY hour
+                )
+                INSERT INTO summaries (summary_type, start_time, end_time, content)
+                SELECT 'hourly',
+                       h.hour,
+                       strftime('%Y-%m-%dT%H:%M:%S', h.hour, '+1 hour'),
+                       printf('%d captures (%.1f min). Labels: %s',
+                              h.captures, h.captures * :interval / 60.0,
+                              coalesce(hl.labels, 'none'))
+                FROM hours h
+                LEFT JOIN hour_labels hl ON hl.hour = h.hour
+                ORDER BY h.hour
+                RETURNING id, start_time, content
+            """, {'interval': capture_interval})
+            return [dict(row) for row in cursor.fetchall()]
     
     def update_summary_video_path(self, summary_id: int, video_path: str) -> None:
         """
@@ -227,13 +710,12 @@ class FocusLogDB:
             summary_id: ID of the summary to update
             video_path: Path to the video file
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE summaries
-            SET video_path = ?
-            WHERE id = ?
-        """, (video_path, summary_id))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            cursor.execute("""
+                UPDATE summaries
+                SET video_path = ?
+                WHERE id = ?
+            """, (video_path, summary_id))
     
     def cleanup_screenshots_except_thumbnails(
         self,
@@ -251,56 +733,61 @@ class FocusLogDB:
         Returns:
             Dict with 'kept' and 'deleted' counts and thumbnail capture IDs
         """
-        cursor = self.conn.cursor()
-        
-        # Get all captures in the time range, ordered by timestamp
-        cursor.execute("""
-            SELECT id, timestamp, screenshot
-            FROM captures
-            WHERE timestamp >= ? AND timestamp < ?
-            ORDER BY timestamp ASC
-        """, (start_time.isoformat(), end_time.isoformat()))
-        
-        captures = cursor.fetchall()
-        
-        if not captures:
-            return {'kept': 0, 'deleted': 0, 'thumbnails': []}
-        
-        # Group captures into 5-minute windows and keep first of each
-        thumbnails = []
-        to_delete = []
-        current_window_start = None
-        
-        for capture in captures:
-            capture_time = datetime.fromisoformat(capture['timestamp'])
+        # Number captures within their 5-minute window; the first of each
+        # window is its thumbnail. Only ids and paths are read, never blobs.
+        # strftime('%s') reads the naive timestamps as UTC, so integer epoch
+        # buckets line up with wall-clock 5-minute windows.
+        ranked = """
+            WITH ranked AS (
+                SELECT id, timestamp, screenshot_path,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY CAST(strftime('%s', timestamp) AS INTEGER) / 300
+                           ORDER BY timestamp
+                       ) AS rn
+                FROM captures
+                WHERE timestamp >= :start AND timestamp < :end
+            )
+        """
+        params = {'start': start_time.isoformat(), 'end': end_time.isoformat()}
+        
+        # One transaction, so the files found unused match the rows cleared
+        with self.transaction() as cursor:
+            cursor.execute(ranked + """
+                SELECT id FROM ranked WHERE rn = 1 ORDER BY timestamp
+            """, params)
+            thumbnails = [row['id'] for row in cursor.fetchall()]
             
-            # Calculate which 5-minute window this capture belongs to
-            minutes = capture_time.minute
-            window_minute = (minutes // 5) * 5
-            window_start = capture_time.replace(minute=window_minute, second=0, microsecond=0)
+            # Identical screenshots share a file, so only files that no
+            # remaining capture uses can be deleted
+            cursor.execute(ranked + """,
+                doomed AS (SELECT id, screenshot_path FROM ranked WHERE rn > 1)
+                SELECT screenshot_path
+                FROM captures
+                WHERE screenshot_path IN (SELECT screenshot_path FROM doomed)
+                GROUP BY screenshot_path
+                HAVING SUM(id NOT IN (SELECT id FROM doomed)) = 0
+            """, params)
+            unused_paths = [row['screenshot_path'] for row in cursor.fetchall()]
             
-            if current_window_start != window_start:
-                # New window - keep this capture as thumbnail
-                thumbnails.append(capture['id'])
-                current_window_start = window_start
-            else:
-                # Same window - mark for deletion
-                to_delete.append(capture['id'])
-        
-        # Delete screenshot blobs for non-thumbnail captures
-        # We keep the capture records for data integrity, just NULL out the screenshot
-        if to_delete:
-            placeholders = ','.join('?' * len(to_delete))
-            cursor.execute(f"""
+            # Drop the image but keep the capture records for data integrity;
+            # the blob column is NOT NULL, so legacy blobs are emptied instead.
+            # The CTE sits in the subquery so sqlite3 still reports rowcount.
+            cursor.execute("""
                 UPDATE captures
-                SET screenshot = NULL
-                WHERE id IN ({placeholders})
-            """, to_delete)
-            self.conn.commit()
+                SET screenshot = X'', screenshot_path = NULL
+                WHERE id IN (""" + ranked + """
+                    SELECT id FROM ranked WHERE rn > 1
+                )
+            """, params)
+            deleted = cursor.rowcount
+        
+        for path in unused_paths:
+            self.screenshot_file(path).unlink(missing_ok=True)
+            self.video_frame_file(path).unlink(missing_ok=True)
         
         return {
             'kept': len(thumbnails),
-            'deleted': len(to_delete),
+            'deleted': deleted,
             'thumbnails': thumbnails
         }
     
@@ -314,62 +801,111 @@ class FocusLogDB:
         Returns:
             Dict with summary data, or None if not found
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT id, summary_type, start_time, end_time, content, created_at
-            FROM summaries
-            WHERE summary_type = ?
-            ORDER BY end_time DESC
-            LIMIT 1
-        """, (summary_type,))
+        with self._reader() as cursor:
+            cursor.execute("""
+                SELECT id, summary_type, start_time, end_time, content, created_at
+                FROM summaries
+                WHERE summary_type = ?
+                ORDER BY end_time DESC
+                LIMIT 1
+            """, (summary_type,))
+            
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
+    
+    def _attach_labels(self, cursor: sqlite3.Cursor, captures: List[Dict[str, Any]]) -> None:
+        """
+        Set each capture's 'labels' list using a single query.
         
-        row = cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
+        Args:
+            cursor: Cursor to query with
+            captures: Capture dicts with an 'id' key, updated in place
+        """
+        by_id = {}
+        for capture in captures:
+            capture['labels'] = []
+            by_id[capture['id']] = capture
+        
+        # Ids are bound as one JSON array: no parameter limit, and the SQL
+        # text stays the same so the prepared statement is reused
+        cursor.execute("""
+            SELECT cl.capture_id, l.name
+            FROM captures_labels cl
+            JOIN labels l ON l.id = cl.label_id
+            WHERE cl.capture_id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(list(by_id)),))
+        for row in cursor.fetchall():
+            by_id[row['capture_id']]['labels'].append(row['name'])
     
     def get_captures_since(
         self,
         since_time: datetime,
-        include_screenshots: bool = False
+        include_screenshots: bool = False,
+        until_time: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """
         Get all captures since a given time.
         
         Args:
-            since_time: Get captures after this time
+            since_time: Get captures from this time on
             include_screenshots: Whether to include screenshot blobs
+            until_time: Only get captures before this time
         
         Returns:
             List of capture dictionaries with labels
         """
-        cursor = self.conn.cursor()
-        
-        if include_screenshots:
-            fields = "id, timestamp, screenshot, description, classification_raw, classification_error, created_at"
-        else:
-            fields = "id, timestamp, description, classification_raw, classification_error, created_at"
+        where, params = _timestamp_range(since_time, until_time)
+        with self._reader() as cursor:
+            fields = CAPTURE_COLUMNS_WITH_SCREENSHOT if include_screenshots else CAPTURE_COLUMNS
+            
+            cursor.execute(f"""
+                SELECT {fields}
+                FROM captures
+                WHERE {where}
+                ORDER BY timestamp ASC
+            """, params)
+            
+            captures = [_capture_dict(row) for row in cursor]
+            
+            self._attach_labels(cursor, captures)
+            return captures
+    
+    def iter_captures_since(
+        self,
+        since_time: datetime,
+        include_screenshots: bool = False,
+        until_time: Optional[datetime] = None
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream captures since a given time, oldest first, without labels.
         
-        cursor.execute(f"""
-            SELECT {fields}
-            FROM captures
-            WHERE timestamp > ?
-            ORDER BY timestamp ASC
-        """, (since_time.isoformat(),))
+        Rows are yielded straight from the cursor, so memory use doesn't grow
+        with the size of the range.
         
-        captures = [dict(row) for row in cursor.fetchall()]
+        Args:
+            since_time: Get captures from this time on
+            include_screenshots: Whether to include legacy screenshot blobs
+            until_time: Only get captures before this time
         
-        # Get labels for each capture
-        for capture in captures:
-            cursor.execute("""
-                SELECT l.name
-                FROM labels l
-                JOIN captures_labels cl ON l.id = cl.label_id
-                WHERE cl.capture_id = ?
-            """, (capture['id'],))
-            capture['labels'] = [r['name'] for r in cursor.fetchall()]
+        Yields:
+            sqlite3.Row with id, timestamp, screenshot_path and optionally screenshot
+        """
+        fields = "id, timestamp, screenshot_path"
+        if include_screenshots:
+            fields += ", screenshot"
+        where, params = _timestamp_range(since_time, until_time)
         
-        return captures
+        # The pooled connection is held until the generator finishes or is closed
+        with self._reader() as cursor:
+            cursor.execute(f"""
+                SELECT {fields}
+                FROM captures
+                WHERE {where}
+                ORDER BY timestamp ASC
+            """, params)
+            yield from cursor
     
     def get_summaries_in_range(
         self,
@@ -388,17 +924,17 @@ class FocusLogDB:
         Returns:
             List of summary dictionaries
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT id, summary_type, start_time, end_time, content, created_at
-            FROM summaries
-            WHERE summary_type = ?
-                AND start_time >= ?
-                AND end_time <= ?
-            ORDER BY start_time ASC
-        """, (summary_type, start_time.isoformat(), end_time.isoformat()))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        with self._reader() as cursor:
+            cursor.execute("""
+                SELECT id, summary_type, start_time, end_time, content, created_at
+                FROM summaries
+                WHERE summary_type = ?
+                    AND start_time >= ?
+                    AND end_time <= ?
+                ORDER BY start_time ASC
+            """, (summary_type, start_time.isoformat(), end_time.isoformat()))
+            
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_capture(self, capture_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -410,30 +946,26 @@ class FocusLogDB:
         Returns:
             Dict with capture data including labels, or None if not found
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT id, timestamp, screenshot, description, 
-                   classification_raw, classification_error, created_at
-            FROM captures
-            WHERE id = ?
-        """, (capture_id,))
-        
-        row = cursor.fetchone()
-        if not row:
-            return None
-        
-        capture = dict(row)
-        
-        # Get labels for this capture
-        cursor.execute("""
-            SELECT l.name
-            FROM labels l
-            JOIN captures_labels cl ON l.id = cl.label_id
-            WHERE cl.capture_id = ?
-        """, (capture_id,))
-        
-        capture['labels'] = [r['name'] for r in cursor.fetchall()]
-        return capture
+        with self._reader() as cursor:
+            # Labels come back as a JSON array so names containing commas survive
+            cursor.execute("""
+                SELECT c.id, c.timestamp, c.screenshot, c.screenshot_path, c.description, 
+                       c.classification_raw, c.classification_error, c.created_at,
+                       json_group_array(l.name) FILTER (WHERE l.name IS NOT NULL) AS labels
+                FROM captures c
+                LEFT JOIN captures_labels cl ON cl.capture_id = c.id
+                LEFT JOIN labels l ON l.id = cl.label_id
+                WHERE c.id = ?
+                GROUP BY c.id
+            """, (capture_id,))
+            
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            capture = _capture_dict(row)
+            capture['labels'] = json.loads(capture['labels'])
+            return capture
     
     def get_recent_captures(
         self,
@@ -450,33 +982,45 @@ class FocusLogDB:
         Returns:
             List of capture dictionaries with labels
         """
-        cursor = self.conn.cursor()
-        
-        if include_screenshots:
-            fields = "id, timestamp, screenshot, description, classification_raw, classification_error, created_at"
-        else:
-            fields = "id, timestamp, description, classification_raw, classification_error, created_at"
+        with self._reader() as cursor:
+            fields = CAPTURE_COLUMNS_WITH_SCREENSHOT if include_screenshots else CAPTURE_COLUMNS
+            
+            cursor.execute(f"""
+                SELECT {fields}
+                FROM captures
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (limit,))
+            
+            captures = [_capture_dict(row) for row in cursor]
+            
+            self._attach_labels(cursor, captures)
+            return captures
+    
+    def get_recent_captures_lite(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Retrieve recent captures with only the fields the dashboard list shows.
         
-        cursor.execute(f"""
-            SELECT {fields}
-            FROM captures
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
+        Skips the raw classification response and loads labels for all
+        captures in a single query.
         
-        captures = [dict(row) for row in cursor.fetchall()]
+        Args:
+            limit: Maximum number of captures to return
         
-        # Get labels for each capture
-        for capture in captures:
+        Returns:
+            List of dicts with id, timestamp, description and labels
+        """
+        with self._reader() as cursor:
             cursor.execute("""
-                SELECT l.name
-                FROM labels l
-                JOIN captures_labels cl ON l.id = cl.label_id
-                WHERE cl.capture_id = ?
-            """, (capture['id'],))
-            capture['labels'] = [r['name'] for r in cursor.fetchall()]
-        
-        return captures
+                SELECT id, timestamp, description
+                FROM captures
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (limit,))
+            
+            captures = [dict(row) for row in cursor]
+            self._attach_labels(cursor, captures)
+            return captures
     
     def get_captures_by_date_range(
         self,
@@ -495,21 +1039,17 @@ class FocusLogDB:
         Returns:
             List of capture dictionaries
         """
-        cursor = self.conn.cursor()
-        
-        if include_screenshots:
-            fields = "id, timestamp, screenshot, classification, classification_raw, classification_error, created_at"
-        else:
-            fields = "id, timestamp, classification, classification_raw, classification_error, created_at"
-        
-        cursor.execute(f"""
-            SELECT {fields}
-            FROM captures
-            WHERE timestamp BETWEEN ? AND ?
-            ORDER BY timestamp DESC
-        """, (start_date.isoformat(), end_date.isoformat()))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        with self._reader() as cursor:
+            fields = CAPTURE_COLUMNS_WITH_SCREENSHOT if include_screenshots else CAPTURE_COLUMNS
+            
+            cursor.execute(f"""
+                SELECT {fields}
+                FROM captures
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp DESC
+            """, (start_date.isoformat(), end_date.isoformat()))
+            
+            return [_capture_dict(row) for row in cursor]
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -518,31 +1058,51 @@ class FocusLogDB:
         Returns:
             Dict with statistics like total captures, date range, etc.
         """
-        cursor = self.conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) as total FROM captures")
-        total = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT MIN(timestamp) as first, MAX(timestamp) as last FROM captures")
-        dates = cursor.fetchone()
-        
-        cursor.execute("""
-            SELECT SUM(LENGTH(screenshot)) as total_size 
-            FROM captures
-        """)
-        total_size = cursor.fetchone()['total_size'] or 0
-        
-        return {
-            "total_captures": total,
-            "first_capture": dates['first'],
-            "last_capture": dates['last'],
-            "total_size_bytes": total_size,
-            "total_size_mb": round(total_size / (1024 * 1024), 2)
-        }
+        with self._reader() as cursor:
+            cursor.execute("SELECT COUNT(*) as total FROM captures")
+            total = cursor.fetchone()['total']
+            
+            cursor.execute("SELECT MIN(timestamp) as first, MAX(timestamp) as last FROM captures")
+            dates = cursor.fetchone()
+            
+            cursor.execute("""
+                SELECT SUM(LENGTH(screenshot)) as total_size 
+                FROM captures
+            """)
+            total_size = cursor.fetchone()['total_size'] or 0
+            
+            # Screenshot files on disk, counted once even when captures share
+            # them; the prescaled frames are copies, so they're left out
+            if self.screenshots_dir.exists():
+                for entry in os.scandir(self.screenshots_dir):
+                    if entry.is_dir() and entry.name != VIDEO_FRAMES_DIR:
+                        total_size += _jpeg_bytes(entry.path)
+            
+            return {
+                "total_captures": total,
+                "first_capture": dates['first'],
+                "last_capture": dates['last'],
+                "total_size_bytes": total_size,
+                "total_size_mb": round(total_size / (1024 * 1024), 2)
+            }
     
     def close(self) -> None:
         """Close the database connection."""
+        # Readers first, so the writer is the last connection and cleans up the WAL.
+        # Closed readers go back in the pool so later reads raise instead of blocking.
+        readers = []
+        while not self._read_pool.empty():
+            readers.append(self._read_pool.get_nowait())
+        for conn in readers:
+            conn.close()
+            self._read_pool.put(conn)
         if self.conn:
+            if not self.read_only:
+                # Let SQLite re-analyze tables this connection's queries relied on
+                self.conn.execute("PRAGMA optimize")
+                # Nothing else writes now, so leave the WAL empty even if
+                # another process still has the database open
+                self.checkpoint("TRUNCATE")
             self.conn.close()
     
     def __enter__(self):
@@ -0,0 +1,27 @@
+"""
+Shared HTTP client for OpenAI API calls.
+"""
+
+import atexit
+
+import httpx
+
+LIMITS = httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120)
+TIMEOUT = httpx.Timeout(60, connect=5)
+
+# One pooled HTTP/2 client for every OpenAI client in the process, so the
+# classifier and summarizer reuse warm connections instead of paying a TLS
+# handshake whenever the pool has idled out between captures
+SHARED_HTTP_CLIENT = httpx.Client(http2=True, limits=LIMITS, timeout=TIMEOUT)
+
+atexit.register(SHARED_HTTP_CLIENT.close)
+
+
+def make_async_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP/2 client for an async OpenAI client.
+    
+    Async clients are tied to the event loop they are first used on, so each
+    loop needs its own rather than a process-wide one.
+    """
+    return httpx.AsyncClient(http2=True, limits=LIMITS, timeout=TIMEOUT)
@@ -0,0 +1,86 @@
+"""
+Loopback HTTP server that hands screenshots to a local vision endpoint.
+
+A self-hosted OpenAI-compatible server (e.g. vLLM) on the same machine can
+fetch images by URL, which skips base64 encoding and decoding entirely.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+import threading
+import time
+import uuid
+
+# Seconds a registered image stays available
+IMAGE_TTL = 60
+
+
+class LocalImageServer:
+    """Serves registered JPEG images at short-lived http://127.0.0.1 URLs."""
+    
+    def __init__(self, ttl: float = IMAGE_TTL):
+        """
+        Start the server on an ephemeral loopback port.
+        
+        Args:
+            ttl: Seconds a registered image stays available
+        """
+        self.ttl = ttl
+        self._images: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+        
+        server = self
+        
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                data = server._lookup(self.path.lstrip("/"))
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(
+            target=self._httpd.serve_forever, name="image-server", daemon=True
+        ).start()
+    
+    def _lookup(self, name: str):
+        """Return the image registered under a URL path, or None if unknown or expired."""
+        with self._lock:
+            entry = self._images.get(name)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+    
+    def register(self, image_data: bytes) -> str:
+        """
+        Make an image available for the next `ttl` seconds.
+        
+        Args:
+            image_data: JPEG image data as bytes
+        
+        Returns:
+            URL the image can be fetched from
+        """
+        now = time.monotonic()
+        name = f"{uuid.uuid4().hex}.jpg"
+        with self._lock:
+            # Drop expired images so the store doesn't grow without bound
+            for key in [k for k, (expires, _) in self._images.items() if expires < now]:
+                del self._images[key]
+            self._images[name] = (now + self.ttl, image_data)
+        return f"http://127.0.0.1:{self.port}/{name}"
+    
+    def close(self) -> None:
+        """Stop serving."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,74 @@
+"""
+Client-side rate limiting for OpenAI API calls.
+"""
+
+from typing import Optional
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe per-minute request and token budget, refilled continuously."""
+    
+    def __init__(self, rpm: int = 3500, tpm: int = 90000):
+        """
+        Initialize the bucket full.
+        
+        Args:
+            rpm: Requests allowed per minute
+            tpm: Tokens (input + output) allowed per minute
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        """Add the capacity regained since the last update."""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    def acquire(self, tokens: int) -> None:
+        """
+        Block until one request and `tokens` tokens are available, then reserve them.
+        
+        Args:
+            tokens: Estimated tokens the request will consume
+        """
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm
+                )
+            time.sleep(wait)
+    
+    def update(
+        self,
+        remaining_requests: Optional[int] = None,
+        remaining_tokens: Optional[int] = None
+    ) -> None:
+        """
+        Lower the local budget to what the API reports is left.
+        
+        Args:
+            remaining_requests: Value of the x-ratelimit-remaining-requests header
+            remaining_tokens: Value of the x-ratelimit-remaining-tokens header
+        """
+        with self._lock:
+            self._refill()
+            if remaining_requests is not None:
+                self._requests = min(self._requests, remaining_requests)
+            if remaining_tokens is not None:
+                self._tokens = min(self._tokens, remaining_tokens)
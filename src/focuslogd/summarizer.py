@@ -4,21 +4,86 @@ Creates hierarchical summaries: 5-minute → hourly summaries.
 """
 
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from typing import Any, Callable, Dict, List, Optional
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+import asyncio
 import os
+import random
+import time
+import traceback
+
+from .http_client import SHARED_HTTP_CLIENT, make_async_http_client
+from .ratelimit import TokenBucket
+
+# Output budget reserved per request; summaries are at most a few sentences
+ESTIMATED_OUTPUT_TOKENS = 400
+
+# Errors worth retrying with backoff; the SDK's own retries are turned off
+# so they don't multiply with ours
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Summary requests in flight at once in agenerate_5min_summaries() and
+# agenerate_hourly_summaries()
+DEFAULT_SUMMARY_CONCURRENCY = 8
+
+# Fixed instructions go first, in the system message, so every request of a
+# kind starts with the same prefix and OpenAI's prompt caching can reuse it.
+# Only the captures or summaries in the user message vary.
+SYSTEM_MSG_5MIN = """You are an activity summarization assistant. Summarize the user's activity over the last 5 minutes based on the screenshot captures the user sends.
+
+Create a concise 2-3 sentence summary that:
+1. Identifies the main activities
+2. Notes any transitions or context switches
+3. Mentions productivity level if clear
+
+Be specific and actionable."""
+
+SYSTEM_MSG_HOURLY = """You are an activity summarization assistant. Summarize the user's activity over the last hour based on the 5-minute summaries the user sends.
+
+Create a comprehensive 3-5 sentence hourly summary that:
+1. Identifies main work/activity themes
+2. Notes productivity patterns and focus areas
+3. Highlights any significant transitions or breaks
+4. Provides actionable insights
+
+Be specific about what was accomplished or focused on."""
+
+
+def _header_int(headers, name: str) -> Optional[int]:
+    """Read an integer rate limit header, if present."""
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
 
 
 class SummaryGenerator:
     """Generates summaries of activity captures."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        max_retries: int = 5,
+        rpm: int = 3500,
+        tpm: int = 90000
+    ):
         """
         Initialize the summary generator.
         
         Args:
             api_key: OpenAI API key. If None, reads from OPENAI_API_KEY env variable
             model: OpenAI model to use (default: gpt-4o-mini)
+            max_retries: Retries with exponential backoff when rate limited (429)
+                or on connection and server errors
+            rpm: Requests per minute to stay under
+            tpm: Tokens per minute to stay under
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
@@ -27,81 +92,254 @@ class SummaryGenerator:
                 "or pass api_key parameter."
             )
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, http_client=SHARED_HTTP_CLIENT, max_retries=0)
+        # Async client for the current event loop, created on first async call
+        self._aclient: Optional[AsyncOpenAI] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
         self.model = model
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rpm=rpm, tpm=tpm)
         print(f"[SummaryGenerator] Using model: {model}")
     
-    def generate_5min_summary(self, captures: List[Dict[str, Any]]) -> str:
+    def _request(self, system: str, prompt: str) -> Dict[str, Any]:
+        """Build the responses API arguments for a summarization prompt."""
+        return dict(
+            model=self.model,
+            input=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ]
+        )
+    
+    @staticmethod
+    def _estimated_tokens(system: str, prompt: str) -> int:
+        """Tokens to reserve for a prompt and its reply, at roughly 4 characters per token."""
+        return (len(system) + len(prompt)) // 4 + ESTIMATED_OUTPUT_TOKENS
+    
+    @staticmethod
+    def _backoff_delay(attempt: int, error: Exception) -> float:
         """
-        Generate a 5-minute summary from recent captures.
+        Seconds to wait before retrying a failed request.
+        
+        1s, 2s, 4s, ... capped at 30s, with jitter to spread out retries,
+        but never sooner than the API asked us to wait.
+        """
+        delay = min(2 ** attempt, 30)
+        # Connection errors have no response to read retry-after from
+        response = getattr(error, "response", None)
+        retry_after = (_header_int(response.headers, "retry-after") if response else None) or 0
+        return max(delay + random.uniform(0, delay / 2), retry_after)
+    
+    def _sync_budget(self, raw) -> None:
+        """Sync the local budget with what the API says is left."""
+        self.bucket.update(
+            remaining_requests=_header_int(raw.headers, "x-ratelimit-remaining-requests"),
+            remaining_tokens=_header_int(raw.headers, "x-ratelimit-remaining-tokens")
+        )
+    
+    def _create_response(self, system: str, prompt: str):
+        """
+        Send a summarization prompt within the rate limit budget, backing off
+        exponentially on rate limits and transient errors.
         
         Args:
-            captures: List of capture dicts with 'labels', 'description', 'timestamp'
+            system: System message with the summarization instructions
+            prompt: User prompt to summarize
         
         Returns:
-            Summary text
+            Response object from the OpenAI responses API
         """
-        if not captures:
-            return "No activity captured in this period."
+        estimated_tokens = self._estimated_tokens(system, prompt)
         
-        # Build context from captures
-        context_parts = []
-        for i, cap in enumerate(captures, 1):
-            labels_str = ", ".join(cap.get('labels', []))
-            desc = cap.get('description', 'No description')
-            timestamp = cap.get('timestamp', '')
-            context_parts.append(f"{i}. [{timestamp}] Labels: {labels_str}\n   {desc}")
-        
-        context = "\n\n".join(context_parts)
-        
-        prompt = f"""Summarize the user's activity over the last 5 minutes based on these {len(captures)} screenshots.
-
-CAPTURES:
-{context}
-
-Create a concise 2-3 sentence summary that:
-1. Identifies the main activities
-2. Notes any transitions or context switches
-3. Mentions productivity level if clear
-
-Be specific and actionable."""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(estimated_tokens)
+            try:
+                raw = self.client.responses.with_raw_response.create(**self._request(system, prompt))
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff_delay(attempt, e))
+                continue
+            
+            self._sync_budget(raw)
+            return raw.parse()
+    
+    def _async_client(self) -> AsyncOpenAI:
+        """
+        Return the async client for the running event loop.
         
-        try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=[
-                    {"role": "system", "content": "You are an activity summarization assistant."},
-                    {"role": "user", "content": prompt}
-                ]
+        Async HTTP connections belong to the loop that opened them, so a new
+        client is made whenever the summarizer is used from a different loop.
+        Callers running their own loop close it with aclose() before it ends.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=make_async_http_client(),
+                max_retries=0
             )
+            self._aclient_loop = loop
+        return self._aclient
+    
+    async def aclose(self) -> None:
+        """Close the async client's HTTP connections, if one is open."""
+        if self._aclient is not None:
+            await self._aclient.close()
+            self._aclient = None
+            self._aclient_loop = None
+    
+    async def _acreate_response(self, system: str, prompt: str):
+        """Async version of _create_response(); waits for budget without blocking the loop."""
+        client = self._async_client()
+        estimated_tokens = self._estimated_tokens(system, prompt)
+        
+        for attempt in range(self.max_retries + 1):
+            await asyncio.to_thread(self.bucket.acquire, estimated_tokens)
+            try:
+                raw = await client.responses.with_raw_response.create(**self._request(system, prompt))
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+                continue
             
-            if not hasattr(response, 'status'):
-                return f"Error generating summary: Invalid response object"
-            
-            if response.status != "completed":
-                return f"Error generating summary: Response status {response.status}"
-            
-            # Safely check for refusal
-            if hasattr(response, 'output') and response.output:
-                if len(response.output) > 0:
-                    first_msg = response.output[0]
-                    if hasattr(first_msg, 'content') and first_msg.content and len(first_msg.content) > 0:
-                        first_content = first_msg.content[0]
-                        if hasattr(first_content, 'type') and first_content.type == "refusal":
-                            return f"Error generating summary: {first_content.refusal}"
-            
-            if not hasattr(response, 'output_text'):
-                return "Error generating summary: No output_text in response"
-            
-            content = response.output_text
-            if content is None or content == "":
-                return "Error generating summary: API returned empty content"
-            return content.strip()
+            self._sync_budget(raw)
+            return raw.parse()
+    
+    @staticmethod
+    def _extract_response_text(response) -> str:
+        """
+        Get the summary text from a response, or an error message.
+        
+        Args:
+            response: Response object from the OpenAI responses API
+        
+        Returns:
+            Summary text, or a string starting with "Error generating summary:"
+        """
+        if not hasattr(response, 'status'):
+            return f"Error generating summary: Invalid response object"
+        
+        if response.status != "completed":
+            return f"Error generating summary: Response status {response.status}"
+        
+        # Safely check for refusal
+        if hasattr(response, 'output') and response.output:
+            if len(response.output) > 0:
+                first_msg = response.output[0]
+                if hasattr(first_msg, 'content') and first_msg.content and len(first_msg.content) > 0:
+                    first_content = first_msg.content[0]
+                    if hasattr(first_content, 'type') and first_content.type == "refusal":
+                        return f"Error generating summary: {first_content.refusal}"
         
+        if not hasattr(response, 'output_text'):
+            return "Error generating summary: No output_text in response"
+        
+        content = response.output_text
+        if content is None or content == "":
+            return "Error generating summary: API returned empty content"
+        return content.strip()
+    
+    def _summarize(self, system: str, prompt: str) -> str:
+        """Send a summarization prompt and return the summary or an error message."""
+        try:
+            return self._extract_response_text(self._create_response(system, prompt))
+        except Exception as e:
+            return f"Error generating summary: {e}\n{traceback.format_exc()}"
+    
+    async def _asummarize(self, system: str, prompt: str) -> str:
+        """Async version of _summarize()."""
+        try:
+            return self._extract_response_text(await self._acreate_response(system, prompt))
         except Exception as e:
-            import traceback
             return f"Error generating summary: {e}\n{traceback.format_exc()}"
     
+    async def agenerate_5min_summary(self, captures: List[Dict[str, Any]]) -> str:
+        """Async version of generate_5min_summary() for concurrent backfills."""
+        if not captures:
+            return "No activity captured in this period."
+        return await self._asummarize(SYSTEM_MSG_5MIN, self._5min_prompt(captures))
+    
+    async def agenerate_hourly_summary(self, five_min_summaries: List[Dict[str, Any]]) -> str:
+        """Async version of generate_hourly_summary() for concurrent backfills."""
+        if not five_min_summaries:
+            return "No activity captured in this hour."
+        return await self._asummarize(SYSTEM_MSG_HOURLY, self._hourly_prompt(five_min_summaries))
+    
+    async def _agenerate_many(
+        self,
+        generate,
+        windows: List[List[Dict[str, Any]]],
+        concurrency: int,
+        on_done: Optional[Callable[[int], None]]
+    ) -> List[str]:
+        """Run an async summary method over several windows, at most concurrency at once."""
+        sem = asyncio.Semaphore(concurrency)
+        
+        async def _summarize(index, items):
+            async with sem:
+                summary = await generate(items)
+            if on_done:
+                on_done(index)
+            return summary
+        
+        return await asyncio.gather(*(_summarize(i, items) for i, items in enumerate(windows)))
+    
+    async def agenerate_5min_summaries(
+        self,
+        windows: List[List[Dict[str, Any]]],
+        concurrency: int = DEFAULT_SUMMARY_CONCURRENCY,
+        on_done: Optional[Callable[[int], None]] = None
+    ) -> List[str]:
+        """
+        Summarize several 5-minute windows concurrently.
+        
+        Args:
+            windows: One list of captures per window
+            concurrency: Maximum number of requests in flight at once
+            on_done: Optional callable run with a window's index once its
+                summary is ready (e.g. for progress output)
+        
+        Returns:
+            Summary texts, in the same order as windows
+        """
+        return await self._agenerate_many(self.agenerate_5min_summary, windows, concurrency, on_done)
+    
+    async def agenerate_hourly_summaries(
+        self,
+        windows: List[List[Dict[str, Any]]],
+        concurrency: int = DEFAULT_SUMMARY_CONCURRENCY,
+        on_done: Optional[Callable[[int], None]] = None
+    ) -> List[str]:
+        """
+        Summarize several hours concurrently (see agenerate_5min_summaries()).
+        
+        Args:
+            windows: One list of 5-minute summaries per hour
+            concurrency: Maximum number of requests in flight at once
+            on_done: Optional callable run with a window's index once its
+                summary is ready
+        
+        Returns:
+            Summary texts, in the same order as windows
+        """
+        return await self._agenerate_many(self.agenerate_hourly_summary, windows, concurrency, on_done)
+    
+    def generate_5min_summary(self, captures: List[Dict[str, Any]]) -> str:
+        """
+        Generate a 5-minute summary from recent captures.
+        
+        Args:
+            captures: List of capture dicts with 'labels', 'description', 'timestamp'
+        
+        Returns:
+            Summary text
+        """
+        if not captures:
+            return "No activity captured in this period."
+        return self._summarize(SYSTEM_MSG_5MIN, self._5min_prompt(captures))
+    
     def generate_hourly_summary(self, five_min_summaries: List[Dict[str, Any]]) -> str:
         """
         Generate an hourly summary from 5-minute summaries.
@@ -114,7 +352,26 @@ Be specific and actionable."""
         """
         if not five_min_summaries:
             return "No activity captured in this hour."
+        return self._summarize(SYSTEM_MSG_HOURLY, self._hourly_prompt(five_min_summaries))
+    
+    @staticmethod
+    def _5min_prompt(captures: List[Dict[str, Any]]) -> str:
+        """Build the user message for a 5-minute summary; instructions are in SYSTEM_MSG_5MIN."""
+        # Build context from captures
+        context_parts = []
+        for i, cap in enumerate(captures, 1):
+            labels_str = ", ".join(cap.get('labels', []))
+            desc = cap.get('description', 'No description')
+            timestamp = cap.get('timestamp', '')
+            context_parts.append(f"{i}. [{timestamp}] Labels: {labels_str}\n   {desc}")
         
+        context = "\n\n".join(context_parts)
+        
+        return f"CAPTURES ({len(captures)} screenshots):\n{context}"
+    
+    @staticmethod
+    def _hourly_prompt(five_min_summaries: List[Dict[str, Any]]) -> str:
+        """Build the user message for an hourly summary; instructions are in SYSTEM_MSG_HOURLY."""
         # Build context from 5-min summaries
         context_parts = []
         for i, summary in enumerate(five_min_summaries, 1):
@@ -125,51 +382,4 @@ Be specific and actionable."""
         
         context = "\n\n".join(context_parts)
         
-        prompt = f"""Summarize the user's activity over the last hour based on these {len(five_min_summaries)} 5-minute summaries.
-
-5-MINUTE SUMMARIES:
-{context}
-
-Create a comprehensive 3-5 sentence hourly summary that:
-1. Identifies main work/activity themes
-2. Notes productivity patterns and focus areas
-3. Highlights any significant transitions or breaks
-4. Provides actionable insights
-
-Be specific about what was accomplished or focused on."""
-        
-        try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=[
-                    {"role": "system", "content": "You are an activity summarization assistant."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            if not hasattr(response, 'status'):
-                return f"Error generating summary: Invalid response object"
-            
-            if response.status != "completed":
-                return f"Error generating summary: Response status {response.status}"
-            
-            # Safely check for refusal
-            if hasattr(response, 'output') and response.output:
-                if len(response.output) > 0:
-                    first_msg = response.output[0]
-                    if hasattr(first_msg, 'content') and first_msg.content and len(first_msg.content) > 0:
-                        first_content = first_msg.content[0]
-                        if hasattr(first_content, 'type') and first_content.type == "refusal":
-                            return f"Error generating summary: {first_content.refusal}"
-            
-            if not hasattr(response, 'output_text'):
-                return "Error generating summary: No output_text in response"
-            
-            content = response.output_text
-            if content is None or content == "":
-                return "Error generating summary: API returned empty content"
-            return content.strip()
-        
-        except Exception as e:
-            import traceback
-            return f"Error generating summary: {e}\n{traceback.format_exc()}"
+        return f"5-MINUTE SUMMARIES ({len(five_min_summaries)}):\n{context}"
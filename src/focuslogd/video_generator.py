@@ -4,25 +4,119 @@ Creates time-lapse videos from hourly screenshot captures.
 """
 
 import subprocess
+import io
 import os
 import tempfile
-from pathlib import Path
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
 import shutil
 
+from PIL import Image
+
+# Timelapses are skimmed, not studied frame by frame, so cap their width
+MAX_VIDEO_WIDTH = 1280
+
+# JPEG quality of the prescaled frames stored at capture time
+VIDEO_FRAME_QUALITY = 85
+
+# Quality target, as CRF for libx264 and the closest equivalent for hardware encoders
+VIDEO_QUALITY = 28
+
+# Hardware H.264 encoders, most preferred first; libx264 is the fallback
+HARDWARE_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_vaapi')
+
+VAAPI_DEVICE = '/dev/dri/renderD128'
+
+# Encoder picked by encoder='auto', probed once per process
+_auto_encoder: Optional[str] = None
+
+# Resolved once at import; without them ffmpeg just runs at normal priority
+_NICE_PATH = shutil.which('nice')
+_IONICE_PATH = shutil.which('ionice')
+
+
+def make_video_frame(image_data: bytes) -> Optional[bytes]:
+    """
+    Downscale a screenshot to MAX_VIDEO_WIDTH for use as a time-lapse frame.
+    
+    Done once at capture time, so video builds read and decode small JPEGs
+    instead of full-resolution screenshots.
+    
+    Args:
+        image_data: Encoded image data as bytes
+    
+    Returns:
+        JPEG image data as bytes, or None if the screenshot is already
+        narrow enough to be used as is
+    """
+    with Image.open(io.BytesIO(image_data)) as im:
+        if im.width <= MAX_VIDEO_WIDTH:
+            return None
+        # Let the JPEG decoder scale down while decoding
+        im.draft("RGB", (MAX_VIDEO_WIDTH, 1))
+        im.thumbnail((MAX_VIDEO_WIDTH, im.height), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.convert("RGB").save(buf, format="JPEG", quality=VIDEO_FRAME_QUALITY)
+        return buf.getvalue()
+
+
+def _available_cores() -> int:
+    """Number of cores this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _concat_quote(path: str) -> str:
+    """Quote a path for an ffmpeg concat list file."""
+    return "'" + path.replace("'", "'\\''") + "'"
+
 
 class VideoGenerator:
     """Generates time-lapse videos from screenshot sequences."""
     
-    def __init__(self, fps: int = 30):
+    def __init__(
+        self,
+        fps: int = 10,
+        preset: str = 'veryfast',
+        tune: str = 'stillimage',
+        encoder: str = 'auto',
+        nice_level: int = 15,
+        threads: Optional[int] = None
+    ):
         """
         Initialize the video generator.
         
         Args:
-            fps: Frames per second for output video (default: 30)
+            fps: Frames per second for output video (default: 10)
+            preset: libx264 speed/size preset (default: veryfast)
+            tune: libx264 tuning for the content (default: stillimage, for
+                slideshow-like screen captures)
+            encoder: ffmpeg H.264 encoder, or 'auto' to use the first working
+                hardware encoder in HARDWARE_ENCODERS and fall back to libx264
+            nice_level: Niceness ffmpeg runs at, so encodes yield the CPU and
+                disk to foreground work (default: 15; 0 for normal priority)
+            threads: Encoder threads per ffmpeg process (default: half the
+                available cores)
         """
         self.fps = fps
+        self.preset = preset
+        self.tune = tune
+        self.nice_level = nice_level
+        self.threads = threads if threads is not None else max(1, _available_cores() // 2)
         self._check_ffmpeg()
+        self.encoder = self._detect_encoder() if encoder == 'auto' else encoder
+    
+    def _ffmpeg_command(self) -> List[str]:
+        """ffmpeg, prefixed to run at background CPU and I/O priority."""
+        prefix = []
+        if self.nice_level and _NICE_PATH:
+            prefix += [_NICE_PATH, '-n', str(self.nice_level)]
+        if self.nice_level and _IONICE_PATH:
+            # Lowest best-effort I/O priority; the idle class could starve
+            # an encode indefinitely on a busy disk
+            prefix += [_IONICE_PATH, '-c', '2', '-n', '7']
+        return [*prefix, 'ffmpeg']
     
     def _check_ffmpeg(self):
         """Check if ffmpeg is installed."""
@@ -34,6 +128,88 @@ class VideoGenerator:
                 "  Arch: sudo pacman -S ffmpeg"
             )
     
+    @staticmethod
+    def _detect_encoder() -> str:
+        """
+        Pick the fastest H.264 encoder that actually works on this machine.
+        
+        ffmpeg builds often list hardware encoders without a device to run
+        them on, so each listed one is tried on a single tiny frame.
+        """
+        global _auto_encoder
+        if _auto_encoder is not None:
+            return _auto_encoder
+        
+        _auto_encoder = 'libx264'
+        try:
+            listed = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-encoders'],
+                capture_output=True, text=True, check=True
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return _auto_encoder
+        
+        for encoder in HARDWARE_ENCODERS:
+            if f" {encoder} " not in listed:
+                continue
+            input_args, output_args = VideoGenerator._encoder_args(encoder, 'veryfast', 'stillimage')
+            cmd = [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                *input_args,
+                '-f', 'lavfi', '-i', 'color=size=256x256',
+                '-frames:v', '1',
+                *output_args,
+                '-f', 'null', '-'
+            ]
+            if subprocess.run(cmd, capture_output=True).returncode == 0:
+                _auto_encoder = encoder
+                break
+        
+        return _auto_encoder
+    
+    @staticmethod
+    def _encoder_args(encoder: str, preset: str, tune: str):
+        """
+        Build the ffmpeg arguments for an encoder.
+        
+        Args:
+            encoder: ffmpeg H.264 encoder name
+            preset: libx264 preset (hardware encoders use their own fastest)
+            tune: libx264 tuning
+        
+        Returns:
+            (input_args, output_args): options placed before the input, and
+            the filter and codec options placed before the output
+        """
+        # Shrink to at most MAX_VIDEO_WIDTH (never upscale), with an even height
+        scale = f"scale='min({MAX_VIDEO_WIDTH},iw)':-2"
+        
+        if encoder == 'h264_nvenc':
+            return [], [
+                '-vf', scale,
+                '-c:v', encoder, '-preset', 'p1', '-tune', 'hq',
+                '-rc', 'vbr', '-cq', str(VIDEO_QUALITY),
+                '-pix_fmt', 'yuv420p'
+            ]
+        if encoder == 'h264_qsv':
+            return [], [
+                '-vf', f"{scale},format=nv12",
+                '-c:v', encoder, '-preset', 'veryfast',
+                '-global_quality', str(VIDEO_QUALITY)
+            ]
+        if encoder == 'h264_vaapi':
+            # Frames are scaled in software, then uploaded to the GPU
+            return ['-vaapi_device', VAAPI_DEVICE], [
+                '-vf', f"{scale},format=nv12,hwupload",
+                '-c:v', encoder, '-qp', str(VIDEO_QUALITY)
+            ]
+        return [], [
+            '-vf', scale,
+            '-c:v', encoder, '-preset', preset, '-tune', tune,
+            '-crf', str(VIDEO_QUALITY),
+            '-pix_fmt', 'yuv420p'
+        ]
+    
     def generate_video(self, screenshot_paths: List[str], output_path: str) -> bool:
         """
         Generate a time-lapse video from screenshots.
@@ -53,42 +229,61 @@ class VideoGenerator:
         output_dir = os.path.dirname(output_path)
         os.makedirs(output_dir, exist_ok=True)
         
-        # Create temporary directory for symlinked files
+        # Skip missing files up front, so they leave no gap in the video
+        frames = []
+        for src_path in screenshot_paths:
+            if not os.path.isfile(src_path):
+                print(f"Warning: Screenshot not found: {src_path}")
+                continue
+            # The demuxer resolves relative paths against the list file's directory
+            frames.append(os.path.abspath(src_path))
+        
+        frame_count = len(frames)
+        if frame_count == 0:
+            print("No valid screenshots found for video generation")
+            return False
+        
+        # ffmpeg's concat demuxer reads the screenshots in place from a list
+        # file, each shown for one frame interval. It can ignore the duration
+        # of the last entry, so the last screenshot is listed once more.
+        lines = ["ffconcat version 1.0"]
+        for src_path in frames:
+            lines.append(f"file {_concat_quote(src_path)}")
+            lines.append(f"duration {1 / self.fps}")
+        lines.append(f"file {_concat_quote(frames[-1])}")
+        
         with tempfile.TemporaryDirectory() as temp_dir:
-            # ffmpeg requires sequential numbered files (frame001.png, frame002.png, etc.)
-            # Create symlinks with proper naming
-            for i, src_path in enumerate(screenshot_paths, 1):
-                if not os.path.exists(src_path):
-                    print(f"Warning: Screenshot not found: {src_path}")
-                    continue
-                
-                # Use zero-padded numbers for proper sorting
-                link_name = f"frame{i:05d}.png"
-                link_path = os.path.join(temp_dir, link_name)
-                os.symlink(src_path, link_path)
-            
-            # Count actual frames
-            frame_count = len(os.listdir(temp_dir))
-            if frame_count == 0:
-                print("No valid screenshots found for video generation")
-                return False
+            concat_path = os.path.join(temp_dir, 'frames.txt')
+            with open(concat_path, 'w') as f:
+                f.write("\n".join(lines) + "\n")
             
-            print(f"Generating video from {frame_count} frames at {self.fps} fps...")
+            print(f"Generating video from {frame_count} frames at {self.fps} fps ({self.encoder})...")
             
             # Build ffmpeg command
-            # -framerate: input framerate
-            # -i: input pattern
-            # -c:v libx264: use H.264 codec
-            # -pix_fmt yuv420p: pixel format for compatibility
-            # -crf 23: quality (lower = better, 23 is default)
+            # -f concat -safe 0: read frames from the list file (absolute paths allowed)
+            # encoder args: scale filter, H.264 codec and quality (see _encoder_args)
+            # -r: constant output frame rate
+            # -frames:v: one frame per screenshot (drops the repeated last entry)
+            # -g: a keyframe every second of video, so players can seek
+            #     (all-intra is several times larger on screen content)
+            # -an: no audio stream
+            # -threads: cap encoder threads, leaving cores for foreground work
+            # -movflags +faststart: put the index first so playback starts immediately
             # -y: overwrite output file
+            input_args, output_args = self._encoder_args(self.encoder, self.preset, self.tune)
             cmd = [
-                'ffmpeg',
-                '-framerate', str(self.fps),
-                '-i', os.path.join(temp_dir, 'frame%05d.png'),
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-crf', '23',
+                *self._ffmpeg_command(),
+                *input_args,
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_path,
+                *output_args,
+                '-r', str(self.fps),
+                '-frames:v', str(frame_count),
+                '-g', str(self.fps),
+                '-an',
+                '-threads', str(self.threads),
+                '-movflags', '+faststart',
                 '-y',  # Overwrite output file
                 output_path
             ]
@@ -103,14 +298,7 @@ class VideoGenerator:
                     check=True
                 )
                 
-                # Verify output file was created
-                if os.path.exists(output_path):
-                    file_size = os.path.getsize(output_path)
-                    print(f"Video generated successfully: {output_path} ({file_size / 1024 / 1024:.2f} MB)")
-                    return True
-                else:
-                    print("Video generation failed: output file not created")
-                    return False
+                return self._check_output(output_path)
                 
             except subprocess.CalledProcessError as e:
                 print(f"ffmpeg error: {e.stderr}")
@@ -119,6 +307,127 @@ class VideoGenerator:
                 print(f"Video generation error: {e}")
                 return False
     
+    def generate_video_from_bytes(
+        self,
+        images: Iterable[bytes],
+        output_path: str,
+        codec: str = 'mjpeg'
+    ) -> bool:
+        """
+        Generate a time-lapse video from in-memory images piped to ffmpeg.
+        
+        Nothing is staged on disk, which suits frames that only exist in
+        memory, such as legacy screenshot blobs read from the database.
+        
+        Args:
+            images: Encoded images in chronological order, all in one format
+            output_path: Absolute path for output video file (should end in .mp4)
+            codec: ffmpeg decoder for the images (default: mjpeg, for JPEG)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        output_dir = os.path.dirname(output_path)
+        os.makedirs(output_dir, exist_ok=True)
+        
+        print(f"Generating video from piped frames at {self.fps} fps ({self.encoder})...")
+        
+        # -f image2pipe: read concatenated images from stdin at -framerate
+        input_args, output_args = self._encoder_args(self.encoder, self.preset, self.tune)
+        cmd = [
+            *self._ffmpeg_command(),
+            '-loglevel', 'error',
+            *input_args,
+            '-f', 'image2pipe',
+            '-framerate', str(self.fps),
+            '-c:v', codec,
+            '-i', 'pipe:0',
+            *output_args,
+            '-g', str(self.fps),
+            '-an',
+            '-threads', str(self.threads),
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+        
+        # stderr goes to a file: a full stderr pipe would stall ffmpeg while
+        # we're blocked writing its stdin
+        with tempfile.TemporaryFile() as stderr:
+            try:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr,
+                    bufsize=1 << 20
+                )
+                try:
+                    for image in images:
+                        proc.stdin.write(image)
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    # ffmpeg exited early; its error is reported below
+                    pass
+                except BaseException:
+                    # The frames failed partway: stop ffmpeg and drop its partial output
+                    proc.kill()
+                    proc.wait()
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    if os.path.exists(output_path):
+                        os.remove(output_path)
+                    raise
+                returncode = proc.wait()
+            except Exception as e:
+                print(f"Video generation error: {e}")
+                return False
+            
+            if returncode != 0:
+                stderr.seek(0)
+                print(f"ffmpeg error: {stderr.read().decode(errors='replace')}")
+                return False
+        
+        return self._check_output(output_path)
+    
+    @staticmethod
+    def _check_output(output_path: str) -> bool:
+        """Report whether ffmpeg wrote the output file."""
+        if os.path.exists(output_path):
+            file_size = os.path.getsize(output_path)
+            print(f"Video generated successfully: {output_path} ({file_size / 1024 / 1024:.2f} MB)")
+            return True
+        print("Video generation failed: output file not created")
+        return False
+    
+    def generate_videos(
+        self,
+        jobs: List[Tuple[List[str], str]],
+        parallelism: Optional[int] = None
+    ) -> List[bool]:
+        """
+        Generate several time-lapse videos, running encodes side by side.
+        
+        A single encode of a short clip leaves cores idle, so a few
+        independent ffmpeg processes fill the machine better.
+        
+        Args:
+            jobs: (screenshot_paths, output_path) pairs, as for generate_video()
+            parallelism: Encodes to run at once (default: 2, or 1 on machines
+                with fewer than 8 cores)
+        
+        Returns:
+            generate_video() result for each job, in order
+        """
+        if parallelism is None:
+            parallelism = max(1, min(2, _available_cores() // 4))
+        
+        # ffmpeg does the work, so threads waiting on it are enough
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            return list(pool.map(lambda job: self.generate_video(*job), jobs))
+    
     def get_video_duration(self, frame_count: int) -> float:
         """
         Calculate video duration in seconds.
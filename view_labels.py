@@ -27,8 +27,18 @@ def main():
         print(f"Error: Database file '{args.database}' not found")
         sys.exit(1)
     
-    with FocusLogDB(db_path=args.database) as db:
-        labels = db.get_all_labels()
+    with FocusLogDB(db_path=args.database, read_only=True) as db:
+        # Names and usage counts in one query, most recently used first;
+        # idx_captures_labels_label lets the counts come from the index alone
+        cursor = db.conn.cursor()
+        cursor.execute("""
+            SELECT l.name, COUNT(cl.capture_id) as count
+            FROM labels l
+            LEFT JOIN captures_labels cl ON cl.label_id = l.id
+            GROUP BY l.id
+            ORDER BY l.last_used DESC
+        """)
+        labels = cursor.fetchall()
         
         print("="*60)
         print("FocusLog Labels")
@@ -39,18 +49,8 @@ def main():
         else:
             print(f"Total labels: {len(labels)}\n")
             
-            # Get usage count for each label
-            cursor = db.conn.cursor()
             for label in labels:
-                cursor.execute("""
-                    SELECT COUNT(*) as count
-                    FROM captures_labels cl
-                    JOIN labels l ON cl.label_id = l.id
-                    WHERE l.name = ?
-                """, (label,))
-                count = cursor.fetchone()['count']
-                print(f"  • {label} ({count} uses)")
-
+                print(f"  • {label['name']} ({label['count']} uses)")
 
 if __name__ == "__main__":
     main()
@@ -40,7 +40,7 @@ def main():
         print(f"Error: Database file '{args.database}' not found")
         sys.exit(1)
     
-    with FocusLogDB(db_path=args.database) as db:
+    with FocusLogDB(db_path=args.database, read_only=True) as db:
         # Show statistics
         stats = db.get_statistics()
         print("="*60)
@@ -58,16 +58,33 @@ def main():
             print(f"Recent {args.limit} captures:")
             print("-"*60)
             
-            captures = db.get_recent_captures(limit=args.limit, include_screenshots=False)
-            for cap in captures:
-                print(f"\nID: {cap['id']}")
-                print(f"Time: {cap['timestamp']}")
-                if cap.get('labels'):
-                    print(f"Labels: {', '.join(cap['labels'])}")
-                if cap.get('description'):
-                    print(f"Description: {cap['description']}")
-                if cap.get('classification_error'):
-                    print(f"Error: {cap['classification_error']}")
+            # Only the printed columns, with labels joined in SQLite, read
+            # as plain tuples instead of sqlite3.Row
+            cursor = db.conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("""
+                SELECT c.id, c.timestamp, group_concat(l.name, ', '),
+                       c.description, c.classification_error
+                FROM (
+                    SELECT id, timestamp, description, classification_error
+                    FROM captures
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                ) c
+                LEFT JOIN captures_labels cl ON cl.capture_id = c.id
+                LEFT JOIN labels l ON l.id = cl.label_id
+                GROUP BY c.id
+                ORDER BY c.timestamp DESC
+            """, (args.limit,))
+            for cap_id, timestamp, labels, description, error in cursor:
+                print(f"\nID: {cap_id}")
+                print(f"Time: {timestamp}")
+                if labels:
+                    print(f"Labels: {labels}")
+                if description:
+                    print(f"Description: {description}")
+                if error:
+                    print(f"Error: {error}")
 
 
 if __name__ == "__main__":
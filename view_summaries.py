@@ -34,6 +34,11 @@ def main():
         default=10,
         help="Number of summaries to show (default: 10)"
     )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Print SQLite's query plan before the summaries"
+    )
     
     args = parser.parse_args()
     
@@ -41,30 +46,39 @@ def main():
         print(f"Error: Database file '{args.database}' not found")
         sys.exit(1)
     
-    with FocusLogDB(db_path=args.database) as db:
+    with FocusLogDB(db_path=args.database, read_only=True) as db:
         cursor = db.conn.cursor()
         
         print("="*80)
         print("FocusLog Summaries")
         print("="*80)
         
-        # Get summaries
+        # Get summaries; idx_summaries_end_time and idx_summaries_type_end
+        # serve ORDER BY end_time DESC LIMIT without sorting the table
         if args.type == 'all':
-            cursor.execute("""
+            query = """
                 SELECT summary_type, start_time, end_time, content, created_at
                 FROM summaries
                 ORDER BY end_time DESC
                 LIMIT ?
-            """, (args.limit,))
+            """
+            params = (args.limit,)
         else:
-            cursor.execute("""
+            query = """
                 SELECT summary_type, start_time, end_time, content, created_at
                 FROM summaries
                 WHERE summary_type = ?
                 ORDER BY end_time DESC
                 LIMIT ?
-            """, (args.type, args.limit))
+            """
+            params = (args.type, args.limit)
+        
+        if args.debug:
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            for row in cursor.fetchall():
+                print(f"  plan: {row['detail']}")
         
+        cursor.execute(query, params)
         summaries = cursor.fetchall()
         
         if not summaries: